@@ -1,9 +1,36 @@
 import random
 import sqlite3
 from datetime import datetime, timedelta, date
+from functools import lru_cache
+from operator import itemgetter
+from bisect import bisect
 from faker import Faker
 import uuid
 import json
+import pickle
+import csv
+import os
+import time
+import shutil
+import hashlib
+import base64
+import io
+import asyncio
+import argparse
+import threading
+import tempfile
+import multiprocessing
+import sys
+import math
+import warnings
+import heapq
+from array import array
+import socket
+from collections import OrderedDict, Counter
+from html import escape
+from urllib.parse import urlsplit, parse_qs
+import faker
+from concurrent.futures import ProcessPoolExecutor
 
 # Initialize Faker with multiple locales for global organization
 fake = Faker(['en_US', 'de_DE', 'fr_FR', 'es_ES', 'it_IT', 'pt_BR', 'zh_CN', 'ja_JP'])
@@ -13,6 +40,57 @@ NUM_TRANSACTIONS = 5000
 START_DATE = date(2023, 1, 1)    # Early start for complete business cycles
 END_DATE = date(2025, 3, 31)     # Extended end to allow realistic payment cycles
 ANALYSIS_FOCUS_YEAR = 2024       # Primary analysis year for PowerBI
+RANDOM_SEED = None               # Set for reproducible (and cacheable) output
+GENERATOR_VERSION = '1.3.0'
+
+# Key skew profiles for hot-partition testing:
+#   partner_zipf      - Zipf exponent of vendor/customer popularity (None = uniform)
+#   month_end_weight  - relative weight of the last PERIOD_END_DAYS of each month
+#   quarter_end_weight - relative weight of the last PERIOD_END_DAYS of each quarter
+#   company_code_share - share of a region's documents on its first company code (None = uniform)
+SKEW_PROFILE = 'uniform'
+PERIOD_END_DAYS = 3
+SKEW_PROFILES = {
+    'uniform': {
+        'partner_zipf': None,
+        'month_end_weight': 1.0,
+        'quarter_end_weight': 1.0,
+        'company_code_share': None
+    },
+    'hot_partners': {
+        'partner_zipf': 1.1,
+        'month_end_weight': 1.0,
+        'quarter_end_weight': 1.0,
+        'company_code_share': None
+    },
+    'period_end': {
+        'partner_zipf': None,
+        'month_end_weight': 4.0,
+        'quarter_end_weight': 8.0,
+        'company_code_share': None
+    },
+    'realistic': {
+        'partner_zipf': 1.1,
+        'month_end_weight': 3.0,
+        'quarter_end_weight': 6.0,
+        'company_code_share': 0.7
+    }
+}
+
+# Record volumes per generator
+TABLE_VOLUMES = {
+    'vendors': 200,
+    'customers': 150,
+    'purchase_orders': 1500,
+    'vendor_invoices': 2000,
+    'sales_invoices': 1800
+}
+
+# Dataset cache keyed by a hash of the effective configuration (seeded runs only)
+USE_CACHE = True
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'sap-data-generator')
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # Least recently used entries are evicted beyond this
+CACHE_RECORDS_ARTIFACT = 'records.pickle'  # Generated tables, cached when a caller needs them back
 
 # Master data configurations
 CURRENCIES = ['USD', 'EUR', 'GBP', 'JPY', 'CNY', 'BRL', 'CAD', 'AUD', 'CHF', 'SEK']
@@ -26,6 +104,10 @@ REGIONS = {
 
 # Realistic payment terms (extended for enterprise scenarios)
 PAYMENT_TERMS = ['Z001', 'Z002', 'Z010', 'Z014', 'Z030', 'Z045', 'Z060', 'Z090', 'Z120']
+# Days past the due date a payment still counts as on time (vendor 'K',
+# customer 'D'); later payments are drawn from the late payment window
+PAYMENT_GRACE_DAYS = {'K': 10, 'D': 15}
+
 PAYMENT_TERMS_DAYS = {
     'Z001': 0,    # Immediate
     'Z002': 7,    # 1 week
@@ -55,6 +137,526 @@ COMPANY_CODES = {
     'MEA': ['5000']
 }
 
+# SQL script profile: 'default' emits autocommitted 100-row INSERTs,
+# 'import' wraps each table in a transaction with load-time pragmas
+SQL_SCRIPT_PROFILE = 'default'
+SQL_TARGET_ENGINE = 'sqlite'
+
+# Partitioned output: transactional tables are split Hive-style into
+# BUKRS=.../GJAHR=.../MONAT=... directories by their posting date column
+PARTITIONED_OUTPUT = False
+PARTITION_OUTPUT_DIR = 'sap_dummy_data'
+PARTITION_FORMAT = 'csv'                # 'csv' or 'sql'
+PARTITION_WORKERS = os.cpu_count() or 1   # Writer processes
+PARTITIONED_TABLES = {
+    'EKKO': 'BEDAT',
+    'RBKP': 'BUDAT',
+    'VBRK': 'FKDAT',
+    'BSEG': 'BUDAT',
+    'BSIK': 'BUDAT',
+    'BSAK': 'BUDAT',
+    'BSID': 'BUDAT',
+    'BSAD': 'BUDAT'
+}
+OUTPUT_FORMATS = {
+    'csv': '.csv',
+    'sql': '.sql'
+}
+
+# Local streaming service (--serve)
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8765
+SERVICE_CHUNK_ROWS = 1000              # Rows per HTTP chunk
+SERVICE_DATASET_CACHE_SIZE = 4         # Seeded datasets kept in memory
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'copy': 'text/plain; charset=utf-8'   # PostgreSQL COPY text format
+}
+
+# Run planner (--plan): volumes of the short calibration run
+PLAN_CALIBRATION_VOLUMES = {
+    'vendors': 40,
+    'customers': 40,
+    'purchase_orders': 300,
+    'vendor_invoices': 300,
+    'sales_invoices': 300
+}
+PLAN_FORMATS = ('sql', 'csv', 'ndjson')
+PLAN_COLLISION_THRESHOLD = 0.01         # Warn above this chance of a duplicate random key
+
+# Data profile: mergeable streaming sketches fed with every generated row
+PROFILE_OUTPUT = True                   # Write <script>.profile.json and .profile.html
+PROFILE_HLL_PRECISION = 14              # 2**14 registers, ~0.8% distinct count error
+PROFILE_QUANTILE_ACCURACY = 0.01        # Relative error of quantile estimates
+PROFILE_QUANTILE_MAX_BINS = 2048        # Per sign; bounds quantile sketch memory at any volume
+PROFILE_QUANTILES = (0.5, 0.9, 0.99)
+PROFILE_DISTINCT_COLUMNS = {
+    'LIFNR': ('EKKO', 'LIFNR'),         # Vendors with purchase orders
+    'KUNNR': ('VBRK', 'KUNRG'),         # Billed customers
+    'MATNR': ('EKPO', 'MATNR')
+}
+PROFILE_QUANTILE_COLUMNS = {
+    'EKPO.NETWR': ('EKPO', 'NETWR'),
+    'VBRK.NETWR': ('VBRK', 'NETWR'),
+    'BSEG.DMBTR': ('BSEG', 'DMBTR')
+}
+PROFILE_COUNTERS = {
+    'approval_status': 'PO approval status',
+    'vendor_payments': 'Vendor payments',
+    'customer_payments': 'Customer payments',
+    'open_items_by_bukrs': 'Open items per company code'
+}
+
+# Randomly drawn document numbers: table, field, volume driving the draws, size of the number space
+RANDOM_NUMBER_RANGES = [
+    ('VBRK', 'VBELN', 'sales_invoices', 90000000),
+    ('BSEG', 'BELNR (AC...)', 'sales_invoices', 90000000)
+]
+
+# Business event stream (--events): event types in same-day ordering priority
+EVENT_TYPES = [
+    'PO_CREATED',
+    'PO_RELEASED',
+    'INVOICE_POSTED',
+    'SALES_INVOICE_BILLED',
+    'ITEM_CLEARED'
+]
+EVENT_RATE = None                      # Events per second, None for as fast as possible
+
+# Parallel SQL script writer: tables (or SQL_SEGMENT_ROWS-row chunks of large
+# tables) are serialized to segment files by a process pool and concatenated
+SQL_WRITER_PROCESSES = os.cpu_count() or 1
+SQL_SEGMENT_ROWS = 100000              # Rounded down to whole 100-row INSERTs
+
+# Per target engine: foreign key statements (every profile; shard scripts
+# use 'foreign_keys_off'), statement limits
+# and load-time settings (the 'import' profile)
+SQL_ENGINE_LIMITS = {
+    'sqlite': {
+        'max_statement_bytes': 1000000,    # Legacy SQLITE_MAX_SQL_LENGTH
+        'max_rows': 500,                   # SQLITE_MAX_COMPOUND_SELECT
+        'begin': 'BEGIN TRANSACTION;',
+        'foreign_keys': ['PRAGMA foreign_keys = ON;'],   # Off per connection by default
+        'foreign_keys_off': ['PRAGMA foreign_keys = OFF;'],
+        'prologue': [
+            'PRAGMA journal_mode = MEMORY;',
+            'PRAGMA synchronous = OFF;',
+            'PRAGMA temp_store = MEMORY;',
+            'PRAGMA cache_size = -65536;'
+        ],
+        'epilogue': [
+            'PRAGMA cache_size = -2000;',
+            'PRAGMA temp_store = DEFAULT;',
+            'PRAGMA synchronous = FULL;',
+            'PRAGMA journal_mode = DELETE;'
+        ]
+    },
+    'mysql': {
+        'max_statement_bytes': 4194304,    # Default max_allowed_packet (4 MB)
+        'max_rows': 5000,
+        'begin': 'START TRANSACTION;',
+        'foreign_keys': ['SET foreign_key_checks = 1;'],
+        'foreign_keys_off': ['SET foreign_key_checks = 0;'],
+        'prologue': ['SET unique_checks = 0;'],
+        'epilogue': ['SET unique_checks = 1;']
+    },
+    'postgresql': {
+        'max_statement_bytes': 16777216,   # Keep statements well below protocol limits
+        'max_rows': 5000,
+        'begin': 'BEGIN;',
+        'foreign_keys': [],                               # Always enforced
+        'foreign_keys_off': ['SET session_replication_role = replica;'],   # Superuser only
+        'prologue': ['SET synchronous_commit = off;'],
+        'epilogue': ['RESET synchronous_commit;']
+    }
+}
+
+# Column schema registry shared by the DDL and the INSERT column lists.
+# Each column is (name, SQL type, description); constraints follow the columns.
+TABLE_SCHEMAS = {
+    'LFA1': {
+        'columns': [
+            ('LIFNR', 'VARCHAR(10) PRIMARY KEY', 'Vendor account number'),
+            ('NAME1', 'VARCHAR(35)', 'Name 1'),
+            ('SORTL', 'VARCHAR(10)', 'Sort field'),
+            ('STRAS', 'VARCHAR(35)', 'Street address'),
+            ('ORT01', 'VARCHAR(35)', 'City'),
+            ('PSTLZ', 'VARCHAR(10)', 'Postal code'),
+            ('LAND1', 'VARCHAR(3)', 'Country key'),
+            ('SPRAS', 'VARCHAR(1)', 'Language key'),
+            ('TELF1', 'VARCHAR(16)', 'Telephone 1'),
+            ('TELFX', 'VARCHAR(31)', 'Fax number'),
+            ('SMTP_ADDR', 'VARCHAR(241)', 'Email address'),
+            ('KTOKK', 'VARCHAR(4)', 'Vendor account group'),
+            ('ERDAT', 'DATE', 'Created on'),
+            ('ERNAM', 'VARCHAR(12)', 'Created by'),
+            ('SPERR', 'VARCHAR(1)', 'Central posting block'),
+            ('LOEVM', 'VARCHAR(1)', 'Central deletion flag')
+        ],
+        'constraints': []
+    },
+    'LFB1': {
+        'columns': [
+            ('LIFNR', 'VARCHAR(10)', 'Vendor account number'),
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('AKONT', 'VARCHAR(10)', 'Reconciliation account'),
+            ('ZTERM', 'VARCHAR(4)', 'Payment terms'),
+            ('REPRF', 'VARCHAR(1)', 'Double invoice check'),
+            ('ZWELS', 'VARCHAR(10)', 'Payment methods'),
+            ('ZAHLS', 'VARCHAR(1)', 'Payment block'),
+            ('FDGRV', 'VARCHAR(10)', 'Planning group'),
+            ('SPERR', 'VARCHAR(1)', 'Posting block')
+        ],
+        'constraints': [
+            'PRIMARY KEY (LIFNR, BUKRS)',
+            'FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR)'
+        ]
+    },
+    'LFM1': {
+        'columns': [
+            ('LIFNR', 'VARCHAR(10)', 'Vendor account number'),
+            ('EKORG', 'VARCHAR(4)', 'Purchasing organization'),
+            ('SPERM', 'VARCHAR(1)', 'Purchasing block'),
+            ('LIFER', 'VARCHAR(35)', 'Vendor sub-range'),
+            ('LIBES', 'VARCHAR(1)', 'Order confirmation required'),
+            ('LIPRE', 'VARCHAR(1)', 'Price comparison'),
+            ('LISER', 'VARCHAR(1)', 'Service-based invoice verification'),
+            ('ZTERM', 'VARCHAR(4)', 'Payment terms'),
+            ('INCO1', 'VARCHAR(3)', 'Incoterms part 1'),
+            ('INCO2', 'VARCHAR(28)', 'Incoterms part 2'),
+            ('WAERS', 'VARCHAR(5)', 'Currency')
+        ],
+        'constraints': [
+            'PRIMARY KEY (LIFNR, EKORG)',
+            'FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR)'
+        ]
+    },
+    'KNA1': {
+        'columns': [
+            ('KUNNR', 'VARCHAR(10) PRIMARY KEY', 'Customer number'),
+            ('NAME1', 'VARCHAR(35)', 'Name 1'),
+            ('SORTL', 'VARCHAR(10)', 'Sort field'),
+            ('STRAS', 'VARCHAR(35)', 'Street address'),
+            ('ORT01', 'VARCHAR(35)', 'City'),
+            ('PSTLZ', 'VARCHAR(10)', 'Postal code'),
+            ('LAND1', 'VARCHAR(3)', 'Country key'),
+            ('SPRAS', 'VARCHAR(1)', 'Language key'),
+            ('TELF1', 'VARCHAR(16)', 'Telephone 1'),
+            ('TELFX', 'VARCHAR(31)', 'Fax number'),
+            ('SMTP_ADDR', 'VARCHAR(241)', 'Email address'),
+            ('KTOKD', 'VARCHAR(4)', 'Customer account group'),
+            ('ERDAT', 'DATE', 'Created on'),
+            ('ERNAM', 'VARCHAR(12)', 'Created by'),
+            ('SPERR', 'VARCHAR(1)', 'Central posting block'),
+            ('LOEVM', 'VARCHAR(1)', 'Central deletion flag')
+        ],
+        'constraints': []
+    },
+    'T052': {
+        'columns': [
+            ('ZTERM', 'VARCHAR(4) PRIMARY KEY', 'Payment terms key'),
+            ('SPRAS', 'VARCHAR(1)', 'Language'),
+            ('TEXT1', 'VARCHAR(50)', 'Description'),
+            ('ZTAG1', 'INTEGER', 'Days 1'),
+            ('ZPRZ1', 'DECIMAL(5,3)', 'Percentage 1'),
+            ('ZMTAG', 'INTEGER', 'Additional months'),
+            ('ZTAG2', 'INTEGER', 'Days 2'),
+            ('ZPRZ2', 'DECIMAL(5,3)', 'Percentage 2'),
+            ('ZTAG3', 'INTEGER', 'Days 3'),
+            ('ZPRZ3', 'DECIMAL(5,3)', 'Percentage 3')
+        ],
+        'constraints': []
+    },
+    'T001': {
+        'columns': [
+            ('BUKRS', 'VARCHAR(4) PRIMARY KEY', 'Company code'),
+            ('BUTXT', 'VARCHAR(25)', 'Company name'),
+            ('WAERS', 'VARCHAR(5)', 'Local currency')
+        ],
+        'constraints': []
+    },
+    'TCURR': {
+        'columns': [
+            ('KURST', 'VARCHAR(4)', 'Exchange rate type'),
+            ('FCURR', 'VARCHAR(5)', 'From currency'),
+            ('TCURR', 'VARCHAR(5)', 'To currency'),
+            ('GDATU', 'DATE', 'Valid from date'),
+            ('UKURS', 'DECIMAL(15,8)', 'Exchange rate'),
+            ('FFACT', 'DECIMAL(9,0)', 'Ratio for from currency units'),
+            ('TFACT', 'DECIMAL(9,0)', 'Ratio for to currency units')
+        ],
+        'constraints': [
+            'PRIMARY KEY (KURST, FCURR, TCURR, GDATU)'
+        ]
+    },
+    'EKKO': {
+        'columns': [
+            ('EBELN', 'VARCHAR(10) PRIMARY KEY', 'Purchase document number'),
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('BSTYP', 'VARCHAR(1)', 'Purchasing document category'),
+            ('BSART', 'VARCHAR(4)', 'Purchasing document type'),
+            ('LIFNR', 'VARCHAR(10)', 'Vendor account number'),
+            ('EKORG', 'VARCHAR(4)', 'Purchasing organization'),
+            ('EKGRP', 'VARCHAR(3)', 'Purchasing group'),
+            ('WAERS', 'VARCHAR(5)', 'Currency'),
+            ('BEDAT', 'DATE', 'Purchase document date'),
+            ('KDATB', 'DATE', 'Validity start date'),
+            ('KDATE', 'DATE', 'Validity end date'),
+            ('ZTERM', 'VARCHAR(4)', 'Payment terms'),
+            ('INCO1', 'VARCHAR(3)', 'Incoterms part 1'),
+            ('INCO2', 'VARCHAR(28)', 'Incoterms part 2'),
+            ('ERNAM', 'VARCHAR(12)', 'Created by'),
+            ('AEDAT', 'DATE', 'Changed on'),
+            ('FRGKE', 'VARCHAR(1)', 'Release indicator'),
+            ('FRGZU', 'VARCHAR(2)', 'Release state'),
+            ('PROCSTAT', 'VARCHAR(2)', 'Procurement process status'),
+            ('MEMORY', 'VARCHAR(1)', 'Incomplete indicator')
+        ],
+        'constraints': [
+            'FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR)',
+            'FOREIGN KEY (ZTERM) REFERENCES T052(ZTERM)'
+        ]
+    },
+    'EKPO': {
+        'columns': [
+            ('EBELN', 'VARCHAR(10)', 'Purchase document number'),
+            ('EBELP', 'VARCHAR(5)', 'Purchase document item number'),
+            ('MATNR', 'VARCHAR(18)', 'Material number'),
+            ('TXZ01', 'VARCHAR(40)', 'Short text'),
+            ('MENGE', 'DECIMAL(13,3)', 'Purchase order quantity'),
+            ('MEINS', 'VARCHAR(3)', 'Order unit'),
+            ('NETPR', 'DECIMAL(11,2)', 'Net price'),
+            ('PEINH', 'DECIMAL(5,0)', 'Price unit'),
+            ('NETWR', 'DECIMAL(13,2)', 'Net order value'),
+            ('WERKS', 'VARCHAR(4)', 'Plant'),
+            ('LGORT', 'VARCHAR(4)', 'Storage location'),
+            ('MATKL', 'VARCHAR(9)', 'Material group'),
+            ('KOSTL', 'VARCHAR(10)', 'Cost center'),
+            ('EINDT', 'DATE', 'Delivery date'),
+            ('UEBTK', 'VARCHAR(1)', 'Unlimited overdelivery allowed'),
+            ('UNTTO', 'DECIMAL(3,1)', 'Underdelivery tolerance'),
+            ('UEBTO', 'DECIMAL(3,1)', 'Overdelivery tolerance'),
+            ('EREKZ', 'VARCHAR(1)', 'Final invoice indicator'),
+            ('REPOS', 'VARCHAR(1)', 'Invoice receipt indicator')
+        ],
+        'constraints': [
+            'PRIMARY KEY (EBELN, EBELP)',
+            'FOREIGN KEY (EBELN) REFERENCES EKKO(EBELN)'
+        ]
+    },
+    'RBKP': {
+        'columns': [
+            ('BELNR', 'VARCHAR(10)', 'Document number'),
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('GJAHR', 'INTEGER', 'Fiscal year'),
+            ('BLART', 'VARCHAR(2)', 'Document type'),
+            ('BLDAT', 'DATE', 'Document date'),
+            ('BUDAT', 'DATE', 'Posting date'),
+            ('XBLNR', 'VARCHAR(16)', 'Reference document number'),
+            ('LIFNR', 'VARCHAR(10)', 'Vendor account number'),
+            ('WAERS', 'VARCHAR(5)', 'Currency'),
+            ('RMWWR', 'DECIMAL(13,2)', 'Gross invoice amount'),
+            ('WMWST1', 'DECIMAL(13,2)', 'Tax amount'),
+            ('EBELN', 'VARCHAR(10)', 'Purchase order number'),
+            ('USNAM', 'VARCHAR(12)', 'User name'),
+            ('CPUDT', 'DATE', 'Entry date'),
+            ('CPUTM', 'TIME', 'Entry time'),
+            ('TCODE', 'VARCHAR(20)', 'Transaction code'),
+            ('STBLG', 'VARCHAR(10)', 'Reversal document number'),
+            ('STJAH', 'INTEGER', 'Reversal fiscal year')
+        ],
+        'constraints': [
+            'PRIMARY KEY (BELNR, BUKRS, GJAHR)',
+            'FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR)',
+            'FOREIGN KEY (EBELN) REFERENCES EKKO(EBELN)'
+        ]
+    },
+    'VBRK': {
+        'columns': [
+            ('VBELN', 'VARCHAR(10) PRIMARY KEY', 'Billing document'),
+            ('FKART', 'VARCHAR(4)', 'Billing type'),
+            ('FKDAT', 'DATE', 'Billing date'),
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('KUNRG', 'VARCHAR(10)', 'Payer'),
+            ('KUNAG', 'VARCHAR(10)', 'Sold-to party'),
+            ('WAERK', 'VARCHAR(5)', 'Currency'),
+            ('NETWR', 'DECIMAL(15,2)', 'Net value'),
+            ('MWSBP', 'DECIMAL(13,2)', 'Tax amount'),
+            ('RFBSK', 'VARCHAR(1)', 'Status for transfer to accounting'),
+            ('ERDAT', 'DATE', 'Created on'),
+            ('ERNAM', 'VARCHAR(12)', 'Created by'),
+            ('FKSTO', 'VARCHAR(1)', 'Billing document is cancelled'),
+            ('VBTYP', 'VARCHAR(1)', 'Document category'),
+            ('SFAKN', 'VARCHAR(10)', 'Cancellation document'),
+            ('KNUMV', 'VARCHAR(10)', 'Document condition')
+        ],
+        'constraints': [
+            'FOREIGN KEY (KUNRG) REFERENCES KNA1(KUNNR)',
+            'FOREIGN KEY (KUNAG) REFERENCES KNA1(KUNNR)'
+        ]
+    },
+    'BSEG': {
+        'columns': [
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('BELNR', 'VARCHAR(10)', 'Document number'),
+            ('GJAHR', 'INTEGER', 'Fiscal year'),
+            ('BUZEI', 'VARCHAR(3)', 'Line item number'),
+            ('KOART', 'VARCHAR(1)', 'Account type'),
+            ('KONTO', 'VARCHAR(10)', 'Account number'),
+            ('DMBTR', 'DECIMAL(13,2)', 'Amount in local currency'),
+            ('WRBTR', 'DECIMAL(13,2)', 'Amount in document currency'),
+            ('SHKZG', 'VARCHAR(1)', 'Debit/Credit indicator'),
+            ('WAERS', 'VARCHAR(5)', 'Currency'),
+            ('ZTERM', 'VARCHAR(4)', 'Payment terms'),
+            ('ZBD1T', 'INTEGER', 'Cash discount days 1'),
+            ('BLDAT', 'DATE', 'Document date'),
+            ('BUDAT', 'DATE', 'Posting date'),
+            ('KOSTL', 'VARCHAR(10)', 'Cost center'),
+            ('AUGDT', 'DATE', 'Clearing date'),
+            ('AUGBL', 'VARCHAR(10)', 'Clearing document')
+        ],
+        'constraints': [
+            'PRIMARY KEY (BUKRS, BELNR, GJAHR, BUZEI)',
+            'FOREIGN KEY (ZTERM) REFERENCES T052(ZTERM)'
+        ]
+    },
+    'BSIK': {
+        'columns': [
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('LIFNR', 'VARCHAR(10)', 'Vendor account number'),
+            ('AUGDT', 'DATE', 'Clearing date'),
+            ('AUGBL', 'VARCHAR(10)', 'Clearing document'),
+            ('GJAHR', 'INTEGER', 'Fiscal year'),
+            ('BELNR', 'VARCHAR(10)', 'Document number'),
+            ('BUZEI', 'VARCHAR(3)', 'Line item number'),
+            ('BUDAT', 'DATE', 'Posting date'),
+            ('BLDAT', 'DATE', 'Document date'),
+            ('WAERS', 'VARCHAR(5)', 'Currency'),
+            ('SHKZG', 'VARCHAR(1)', 'Debit/Credit indicator'),
+            ('DMBTR', 'DECIMAL(13,2)', 'Amount in local currency'),
+            ('WRBTR', 'DECIMAL(13,2)', 'Amount in document currency'),
+            ('ZTERM', 'VARCHAR(4)', 'Payment terms'),
+            ('ZFBDT', 'DATE', 'Baseline date for due date calculation'),
+            ('ZBD1T', 'INTEGER', 'Cash discount days 1')
+        ],
+        'constraints': [
+            'PRIMARY KEY (BUKRS, LIFNR, GJAHR, BELNR, BUZEI)',
+            'FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR)'
+        ]
+    },
+    'BSAK': {
+        'columns': [
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('LIFNR', 'VARCHAR(10)', 'Vendor account number'),
+            ('AUGDT', 'DATE', 'Clearing date'),
+            ('AUGBL', 'VARCHAR(10)', 'Clearing document'),
+            ('GJAHR', 'INTEGER', 'Fiscal year'),
+            ('BELNR', 'VARCHAR(10)', 'Document number'),
+            ('BUZEI', 'VARCHAR(3)', 'Line item number'),
+            ('BUDAT', 'DATE', 'Posting date'),
+            ('BLDAT', 'DATE', 'Document date'),
+            ('WAERS', 'VARCHAR(5)', 'Currency'),
+            ('SHKZG', 'VARCHAR(1)', 'Debit/Credit indicator'),
+            ('DMBTR', 'DECIMAL(13,2)', 'Amount in local currency'),
+            ('WRBTR', 'DECIMAL(13,2)', 'Amount in document currency'),
+            ('ZTERM', 'VARCHAR(4)', 'Payment terms'),
+            ('ZFBDT', 'DATE', 'Baseline date for due date calculation'),
+            ('ZBD1T', 'INTEGER', 'Cash discount days 1')
+        ],
+        'constraints': [
+            'PRIMARY KEY (BUKRS, LIFNR, AUGDT, AUGBL, GJAHR, BELNR, BUZEI)',
+            'FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR)'
+        ]
+    },
+    'BSID': {
+        'columns': [
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('KUNNR', 'VARCHAR(10)', 'Customer number'),
+            ('AUGDT', 'DATE', 'Clearing date'),
+            ('AUGBL', 'VARCHAR(10)', 'Clearing document'),
+            ('GJAHR', 'INTEGER', 'Fiscal year'),
+            ('BELNR', 'VARCHAR(10)', 'Document number'),
+            ('BUZEI', 'VARCHAR(3)', 'Line item number'),
+            ('BUDAT', 'DATE', 'Posting date'),
+            ('BLDAT', 'DATE', 'Document date'),
+            ('WAERS', 'VARCHAR(5)', 'Currency'),
+            ('SHKZG', 'VARCHAR(1)', 'Debit/Credit indicator'),
+            ('DMBTR', 'DECIMAL(13,2)', 'Amount in local currency'),
+            ('WRBTR', 'DECIMAL(13,2)', 'Amount in document currency'),
+            ('ZTERM', 'VARCHAR(4)', 'Payment terms'),
+            ('ZFBDT', 'DATE', 'Baseline date for due date calculation'),
+            ('ZBD1T', 'INTEGER', 'Cash discount days 1')
+        ],
+        'constraints': [
+            'PRIMARY KEY (BUKRS, KUNNR, GJAHR, BELNR, BUZEI)',
+            'FOREIGN KEY (KUNNR) REFERENCES KNA1(KUNNR)'
+        ]
+    },
+    'BSAD': {
+        'columns': [
+            ('BUKRS', 'VARCHAR(4)', 'Company code'),
+            ('KUNNR', 'VARCHAR(10)', 'Customer number'),
+            ('AUGDT', 'DATE', 'Clearing date'),
+            ('AUGBL', 'VARCHAR(10)', 'Clearing document'),
+            ('GJAHR', 'INTEGER', 'Fiscal year'),
+            ('BELNR', 'VARCHAR(10)', 'Document number'),
+            ('BUZEI', 'VARCHAR(3)', 'Line item number'),
+            ('BUDAT', 'DATE', 'Posting date'),
+            ('BLDAT', 'DATE', 'Document date'),
+            ('WAERS', 'VARCHAR(5)', 'Currency'),
+            ('SHKZG', 'VARCHAR(1)', 'Debit/Credit indicator'),
+            ('DMBTR', 'DECIMAL(13,2)', 'Amount in local currency'),
+            ('WRBTR', 'DECIMAL(13,2)', 'Amount in document currency'),
+            ('ZTERM', 'VARCHAR(4)', 'Payment terms'),
+            ('ZFBDT', 'DATE', 'Baseline date for due date calculation'),
+            ('ZBD1T', 'INTEGER', 'Cash discount days 1')
+        ],
+        'constraints': [
+            'PRIMARY KEY (BUKRS, KUNNR, AUGDT, AUGBL, GJAHR, BELNR, BUZEI)',
+            'FOREIGN KEY (KUNNR) REFERENCES KNA1(KUNNR)'
+        ]
+    }
+}
+
+# Local (company code) currency per company code
+COMPANY_CODE_CURRENCIES = {
+    '1000': 'USD',
+    '1100': 'CAD',
+    '2000': 'EUR',
+    '2100': 'GBP',
+    '2200': 'SEK',
+    '3000': 'JPY',
+    '3100': 'AUD',
+    '4000': 'BRL',
+    '5000': 'USD'
+}
+
+# Exchange rates (units per USD) at START_DATE; daily rates follow a random walk
+BASE_EXCHANGE_RATES = {
+    'USD': 1.0,
+    'EUR': 0.92,
+    'GBP': 0.79,
+    'JPY': 140.0,
+    'CNY': 7.1,
+    'BRL': 5.0,
+    'CAD': 1.35,
+    'AUD': 1.5,
+    'CHF': 0.9,
+    'SEK': 10.5
+}
+EXCHANGE_RATE_VOLATILITY = 0.004         # Daily standard deviation of log returns
+EXCHANGE_RATE_TYPE = 'M'                 # Standard translation at average rate
+
+# Secondary index tables for vendor (K) and customer (D) items by clearing status
+ITEM_INDEX_TABLES = {
+    ('K', False): 'BSIK',   # Vendor open items
+    ('K', True): 'BSAK',    # Vendor cleared items
+    ('D', False): 'BSID',   # Customer open items
+    ('D', True): 'BSAD'     # Customer cleared items
+}
+ITEM_INDEX_PARTNER_FIELDS = {'K': 'LIFNR', 'D': 'KUNNR'}
+
 def safe_date_convert(date_obj):
     """Convert date/datetime objects to date consistently"""
     if isinstance(date_obj, datetime):
@@ -64,8 +666,409 @@ def safe_date_convert(date_obj):
     else:
         return date_obj
 
+def batch_value_statements(header, value_statements, engine=SQL_TARGET_ENGINE):
+    """Split VALUES tuples into batches that fit the engine's statement limits"""
+    limits = SQL_ENGINE_LIMITS[engine]
+    budget = limits['max_statement_bytes'] - len(header.encode('utf-8')) - 2
+    batch = []
+    batch_bytes = 0
+    
+    for statement in value_statements:
+        # Each tuple costs its encoded length plus the ",\n" separator
+        statement_bytes = len(statement.encode('utf-8')) + 2
+        if batch and (batch_bytes + statement_bytes > budget or len(batch) >= limits['max_rows']):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(statement)
+        batch_bytes += statement_bytes
+    
+    if batch:
+        yield batch
+
+def table_columns(table_name):
+    """Return the INSERT column order of a table from the schema registry"""
+    return [column[0] for column in TABLE_SCHEMAS[table_name]['columns']]
+
+def table_ddl(table_name):
+    """Render the CREATE TABLE statement of a table from the schema registry"""
+    schema = TABLE_SCHEMAS[table_name]
+    columns = schema['columns']
+    constraints = schema['constraints']
+    lines = []
+    
+    for i, (name, sql_type, description) in enumerate(columns):
+        separator = ',' if constraints or i < len(columns) - 1 else ''
+        lines.append(f"    {f'{name} {sql_type}{separator}':<34}-- {description}")
+    for i, constraint in enumerate(constraints):
+        separator = ',' if i < len(constraints) - 1 else ''
+        lines.append(f"    {constraint}{separator}")
+    
+    return f"\nCREATE TABLE {table_name} (\n" + '\n'.join(lines) + "\n);\n"
+
+def format_sql_value(value):
+    """Format a single Python value as a SQL literal (None and '' become NULL)"""
+    if value is None or value == '':
+        return 'NULL'
+    elif isinstance(value, str):
+        # Escape single quotes
+        escaped_value = value.replace("'", "''")
+        return f"'{escaped_value}'"
+    elif isinstance(value, (int, float)):
+        return str(value)
+    elif isinstance(value, (datetime, date)):
+        return f"'{value.strftime('%Y-%m-%d')}'"
+    else:
+        return f"'{str(value)}'"
+
+def column_kind(sql_type):
+    """Classify a registry SQL type as 'date', 'number', 'code' or 'string'"""
+    base_type = sql_type.split('(')[0].split()[0]
+    if base_type == 'DATE':
+        return 'date'
+    elif base_type in ('INTEGER', 'DECIMAL'):
+        return 'number'
+    elif base_type == 'VARCHAR' and int(sql_type.split('(')[1].split(')')[0]) <= SERIALIZER_CODE_LENGTH:
+        return 'code'
+    return 'string'
+
+# Bound on memoised literals per code/date column of a compiled serializer
+SERIALIZER_MEMO_SIZE = 65536
+# String columns up to this declared length are codes (BUKRS, WAERS, SHKZG...)
+# with few distinct values; longer ones are formatted inline without a memo
+SERIALIZER_CODE_LENGTH = 5
+
+def memoized_literal(memo, value_type):
+    """Return a formatter that remembers literals of value_type (and NULL) in memo"""
+    def format_and_remember(value):
+        literal = format_sql_value(value)
+        if (type(value) is value_type or value is None) and len(memo) < SERIALIZER_MEMO_SIZE:
+            memo[value] = literal
+        return literal
+    return format_and_remember
+
+@lru_cache(maxsize=None)
+def compile_row_serializer(table_name):
+    """Compile a function turning one record of a table into a VALUES tuple
+    
+    The generated code unpacks all columns with a single itemgetter call.
+    Numeric and free-text columns are formatted inline, while short code
+    columns and date columns look their literal up in a per-column memo,
+    since those values repeat heavily; document numbers, materials and texts
+    rarely do, so a memo would only add a miss per value. Values whose Python
+    type does not match the registry type fall back to format_sql_value, so
+    NULL handling is unchanged.
+    """
+    columns = TABLE_SCHEMAS[table_name]['columns']
+    names = [column[0] for column in columns]
+    namespace = {
+        'getter': itemgetter(*names),
+        'names': names,
+        'fmt': format_sql_value
+    }
+    unpack = ', '.join(f"v{i}" for i in range(len(columns)))
+    lines = [
+        f"def serialize_{table_name}(record):",
+        "    try:",
+        f"        {unpack}, = getter(record)",
+        "    except KeyError:",
+        f"        {unpack}, = [record.get(name) for name in names]"
+    ]
+    
+    for i, (_, sql_type, _) in enumerate(columns):
+        kind = column_kind(sql_type)
+        if kind == 'number':
+            lines.append(f"    c{i} = str(v{i}) if type(v{i}) is float or type(v{i}) is int else fmt(v{i})")
+        elif kind == 'string':
+            lines.append(f"""    c{i} = "'" + v{i}.replace("'", "''") + "'" if type(v{i}) is str and v{i} else fmt(v{i})""")
+        else:
+            memo = {}
+            namespace[f"memo{i}"] = memo
+            namespace[f"miss{i}"] = memoized_literal(memo, date if kind == 'date' else str)
+            lines.append(f"    c{i} = memo{i}[v{i}] if v{i} in memo{i} else miss{i}(v{i})")
+    
+    literals = ', '.join(f"{{c{i}}}" for i in range(len(columns)))
+    lines.append(f'    return f"({literals})"')
+    
+    exec(compile('\n'.join(lines), f"<serializer {table_name}>", 'exec'), namespace)
+    return namespace[f"serialize_{table_name}"]
+
+def partition_values(table_name, record):
+    """Return the (column, value) pairs of the partition a record belongs to"""
+    posting_date = safe_date_convert(record[PARTITIONED_TABLES[table_name]])
+    return (
+        ('BUKRS', record['BUKRS']),
+        ('GJAHR', str(posting_date.year)),
+        ('MONAT', f"{posting_date.month:02d}")
+    )
+
+def format_csv_value(value):
+    """Format a single Python value as a CSV field (None becomes empty)"""
+    if value is None:
+        return ''
+    elif isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+def format_copy_value(value):
+    """Format a single Python value for PostgreSQL COPY text format"""
+    if value is None or value == '':
+        return '\\N'
+    elif isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def json_default(value):
+    """json.dumps fallback rendering dates as YYYY-MM-DD"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def format_stream_rows(columns, records, output_format, include_header=False):
+    """Render records as NDJSON, CSV or COPY text lines"""
+    if output_format == 'ndjson':
+        return ''.join(
+            json.dumps({col: record.get(col) for col in columns}, default=json_default, ensure_ascii=False) + '\n'
+            for record in records
+        )
+    elif output_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if include_header:
+            writer.writerow(columns)
+        writer.writerows([format_csv_value(record.get(col)) for col in columns] for record in records)
+        return buffer.getvalue()
+    return ''.join('\t'.join(format_copy_value(record.get(col)) for col in columns) + '\n' for record in records)
+
+def zipf_cum_weights(count, exponent):
+    """Cumulative Zipf weights (rank ** -exponent) for random.choices cum_weights"""
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, count + 1):
+        total += rank ** -exponent
+        cum_weights.append(total)
+    return cum_weights
+
+def posting_day_table(start_date, end_date, month_end_weight, quarter_end_weight):
+    """Return the days of a window and their cumulative weights, with the last
+    PERIOD_END_DAYS of every month and quarter weighted up"""
+    days = []
+    cum_weights = []
+    total = 0.0
+    day = start_date
+    
+    while day <= end_date:
+        next_month = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        weight = 1.0
+        if (next_month - day).days <= PERIOD_END_DAYS:
+            weight = quarter_end_weight if day.month % 3 == 0 else month_end_weight
+        total += weight
+        days.append(day)
+        cum_weights.append(total)
+        day += timedelta(days=1)
+    
+    return days, cum_weights
+
+class ExchangeRateIndex:
+    """Dense daily exchange rates for every currency pair over a date window
+    
+    USD rates follow a seeded log-normal random walk from BASE_EXCHANGE_RATES.
+    Cross rates are rounded to 8 decimals, exactly as written to TCURR, and
+    stored in a flat array('d') indexed by (day, from, to). A lookup is
+    therefore two dict lookups and one array read, whatever the volume.
+    """
+    
+    def __init__(self, start_date, end_date, seed=None):
+        rng = random.Random(seed)
+        self.start_date = start_date
+        self.days = (end_date - start_date).days + 1
+        self.currencies = list(BASE_EXCHANGE_RATES)
+        self.currency_index = {currency: i for i, currency in enumerate(self.currencies)}
+        count = len(self.currencies)
+        
+        usd_rates = list(BASE_EXCHANGE_RATES.values())
+        self.rates = array('d', bytes(8 * self.days * count * count))
+        for day in range(self.days):
+            if day:
+                usd_rates = [rate if currency == 'USD' else rate * (1 + rng.gauss(0, EXCHANGE_RATE_VOLATILITY))
+                             for currency, rate in zip(self.currencies, usd_rates)]
+            offset = day * count * count
+            for i, from_rate in enumerate(usd_rates):
+                for j, to_rate in enumerate(usd_rates):
+                    self.rates[offset + i * count + j] = 1.0 if i == j else round(to_rate / from_rate, 8)
+    
+    def rate(self, from_currency, to_currency, on_date):
+        """Units of to_currency per unit of from_currency on a date (clamped to the window)"""
+        day = min(max((on_date - self.start_date).days, 0), self.days - 1)
+        count = len(self.currencies)
+        return self.rates[(day * count + self.currency_index[from_currency]) * count
+                          + self.currency_index[to_currency]]
+    
+    def convert(self, amount, from_currency, to_currency, on_date):
+        if from_currency == to_currency:
+            return amount
+        return round(amount * self.rate(from_currency, to_currency, on_date), 2)
+    
+    def records(self, to_currencies):
+        """Generate TCURR rows: one per day for every currency into each of to_currencies"""
+        rows = []
+        for day in range(self.days):
+            valid_from = self.start_date + timedelta(days=day)
+            for to_currency in to_currencies:
+                for from_currency in self.currencies:
+                    if from_currency != to_currency:
+                        rows.append({
+                            'KURST': EXCHANGE_RATE_TYPE,
+                            'FCURR': from_currency,
+                            'TCURR': to_currency,
+                            'GDATU': valid_from,
+                            'UKURS': self.rate(from_currency, to_currency, valid_from),
+                            'FFACT': 1,
+                            'TFACT': 1
+                        })
+        return rows
+
+# Records shared with forked serialization workers (SQL segments, partitions)
+# while a pool is running
+WORKER_SOURCE_DATA = None
+
+def fork_context():
+    """Return the 'fork' multiprocessing context, or None where fork is unavailable
+    
+    Forked workers inherit WORKER_SOURCE_DATA instead of receiving the
+    records pickled.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+def write_sql_segment(path, table_name, start, stop, profile, engine, comment, records=None):
+    """Process pool worker: write the INSERT statements for rows start:stop of a table
+    
+    Records come from WORKER_SOURCE_DATA, inherited from the parent when
+    workers are forked, or are passed in explicitly otherwise.
+    """
+    if records is None:
+        records = WORKER_SOURCE_DATA[table_name][start:stop]
+    statements = SAPDataGenerator().create_insert_statements(table_name, records, profile, engine, comment)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(statements)
+    return path
+
+def write_partition_file(key, directory, output_format, engine, records=None):
+    """Process pool worker: write the partition key = (table, partition values)
+    
+    Records come from WORKER_SOURCE_DATA[key] when forked, or are passed in.
+    """
+    if records is None:
+        records = WORKER_SOURCE_DATA[key]
+    return SAPDataGenerator().write_partition(key[0], records, directory, output_format, engine)
+
+def kernel_copy(source_fd, destination_fd, count):
+    """Copy up to count bytes between file descriptors without leaving the kernel"""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            return os.copy_file_range(source_fd, destination_fd, count)
+        except OSError:
+            pass
+    return os.sendfile(destination_fd, source_fd, None, count)
+
+def append_file(destination_fd, source_path):
+    """Append a file to an open descriptor, in-kernel where the platform allows"""
+    with open(source_path, 'rb') as source:
+        source_fd = source.fileno()
+        remaining = os.fstat(source_fd).st_size
+        try:
+            while remaining > 0:
+                copied = kernel_copy(source_fd, destination_fd, remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        except (AttributeError, OSError):
+            # No in-kernel copy between these files: stream the rest through user space
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                view = memoryview(block)
+                while view:
+                    view = view[os.write(destination_fd, view):]
+
+class CounterRows:
+    """Lazily generated, randomly addressable rows of one entity in counter-based mode
+    
+    Indexing returns the entity's primary record (LFA1, KNA1, EKKO...), so the
+    sequence can stand in for a list in draw_partner; entry() returns all
+    rows generated for the index. Rows are built on first access only.
+    """
+    
+    def __init__(self, generator, entity, count):
+        self.generator = generator
+        self.entity = entity
+        self.count = count
+        self.entries = {}
+    
+    def __len__(self):
+        return self.count
+    
+    def __getitem__(self, index):
+        return self.entry(index)[0]
+    
+    def entry(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(f"{self.entity} row {index} out of range (0-{self.count - 1})")
+        if index not in self.entries:
+            # A row referenced from inside another row's generation must not
+            # disturb the referencing row's random stream
+            state = random.getstate(), self.generator.row_random.getstate()
+            try:
+                self.entries[index] = self.generator.counter_row(self.entity, index)
+            finally:
+                random.setstate(state[0])
+                self.generator.row_random.setstate(state[1])
+        return self.entries[index]
+    
+    def index_by(self, field):
+        """Map a key field of the generated primary records to their row index"""
+        return {entry[0][field]: index for index, entry in self.entries.items()}
+
 class SAPDataGenerator:
-    def __init__(self):
+    def __init__(self, seed=RANDOM_SEED, volumes=None, start_date=START_DATE, end_date=END_DATE,
+                 skew_profile=SKEW_PROFILE):
+        if start_date > end_date:
+            raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+        if skew_profile not in SKEW_PROFILES:
+            raise ValueError(f"Unknown skew profile: {skew_profile}")
+        self.seed = seed
+        self.volumes = {**TABLE_VOLUMES, **(volumes or {})}
+        self.start_date = start_date
+        self.end_date = end_date
+        
+        # Focus window for the 70% date weighting, clipped to the data range
+        # (the whole range when the focus year falls outside it)
+        self.focus_start = max(date(ANALYSIS_FOCUS_YEAR, 1, 1), start_date)
+        self.focus_end = min(date(ANALYSIS_FOCUS_YEAR, 12, 31), end_date)
+        if self.focus_start > self.focus_end:
+            self.focus_start, self.focus_end = start_date, end_date
+        
+        # Precomputed sampling tables for the skew profile; every draw is a
+        # bisect over cumulative weights (random.choices), i.e. O(log n)
+        self.skew_profile = skew_profile
+        self.skew = SKEW_PROFILES[skew_profile]
+        self.partner_cum_weights = {}
+        self.focus_day_table = None
+        self.all_day_table = None
+        if self.skew['month_end_weight'] != 1.0 or self.skew['quarter_end_weight'] != 1.0:
+            peaks = (self.skew['month_end_weight'], self.skew['quarter_end_weight'])
+            self.focus_day_table = posting_day_table(self.focus_start, self.focus_end, *peaks)
+            self.all_day_table = posting_day_table(start_date, end_date, *peaks)
+        self.exchange_rate_index = None
+        
+        self.company_code_cum_weights = {}
+        if self.skew['company_code_share'] is not None:
+            share = self.skew['company_code_share']
+            for region, codes in COMPANY_CODES.items():
+                if len(codes) > 1:
+                    weights = [share] + [(1 - share) / (len(codes) - 1)] * (len(codes) - 1)
+                    self.company_code_cum_weights[region] = [sum(weights[:i + 1]) for i in range(len(weights))]
         self.vendors = []
         self.customers = []
         self.purchase_orders = []
@@ -74,7 +1077,117 @@ class SAPDataGenerator:
         self.payments = []
         self.chart_of_accounts = []
         self.cost_centers_data = []
+        self.item_indexes = {table_name: [] for table_name in ITEM_INDEX_TABLES.values()}
+        self.stage_seconds = {}
+        
+        # Counter-based mode (generate_rows): per-entity lazy rows and the
+        # stream shared by Faker's locale factories
+        self.counter_tables = {}
+        self.row_random = random.Random()
+        
+    def draw_partner(self, partners):
+        """Pick a vendor or customer, Zipf-skewed by list position if configured"""
+        if self.skew['partner_zipf'] is None:
+            return random.choice(partners)
+        cum_weights = self.partner_cum_weights.get(len(partners))
+        if cum_weights is None:
+            cum_weights = zipf_cum_weights(len(partners), self.skew['partner_zipf'])
+            self.partner_cum_weights[len(partners)] = cum_weights
+        return random.choices(partners, cum_weights=cum_weights)[0]
+    
+    def draw_company_code(self, region):
+        """Pick a company code of a region, concentrated on the first if configured"""
+        cum_weights = self.company_code_cum_weights.get(region)
+        if cum_weights is None:
+            return random.choice(COMPANY_CODES[region])
+        return random.choices(COMPANY_CODES[region], cum_weights=cum_weights)[0]
+    
+    def draw_document_date(self):
+        """Pick a document date weighted toward the analysis focus year (70%)
+        but allowing the full range, with period-end peaks if configured"""
+        if random.random() < 0.7:
+            if self.focus_day_table:
+                return random.choices(self.focus_day_table[0], cum_weights=self.focus_day_table[1])[0]
+            return fake.date_between(start_date=self.focus_start, end_date=self.focus_end)
+        if self.all_day_table:
+            return random.choices(self.all_day_table[0], cum_weights=self.all_day_table[1])[0]
+        return fake.date_between(start_date=self.start_date, end_date=self.end_date)
+    
+    def draw_day_between(self, start_date, end_date):
+        """Pick a day of a window inside the data range, with period-end peaks if configured
+        
+        Bisects the window's slice of the full-range day table, with the
+        cumulative weights offset to start at the window, i.e. O(log n).
+        """
+        if self.all_day_table is None:
+            return fake.date_between(start_date=start_date, end_date=end_date)
+        days, cum_weights = self.all_day_table
+        low = (start_date - self.start_date).days
+        high = (end_date - self.start_date).days
+        base = cum_weights[low - 1] if low else 0.0
+        return days[bisect(cum_weights, base + random.random() * (cum_weights[high] - base), low, high)]
+    
+    def vendor_rows(self, i):
+        """Generate vendor i: its LFA1 row, LFB1 rows and LFM1 row"""
+        vendor_company_data = []
         
+        vendor_id = f"V{10000 + i:06d}"
+        region = random.choice(list(REGIONS.keys()))
+        country = random.choice(REGIONS[region])
+        currency = random.choice(CURRENCIES)
+        
+        # LFA1 - Vendor Master
+        vendor = {
+            'LIFNR': vendor_id,
+            'NAME1': fake.company()[:35],
+            'SORTL': fake.lexify('????').upper(),
+            'STRAS': fake.street_address()[:35],
+            'ORT01': fake.city()[:35],
+            'PSTLZ': fake.postcode()[:10],
+            'LAND1': country,
+            'SPRAS': 'EN',
+            'TELF1': fake.phone_number()[:16],
+            'TELFX': fake.phone_number()[:16],
+            'SMTP_ADDR': fake.company_email()[:50],
+            'KTOKK': 'Z001',
+            'ERDAT': fake.date_between(start_date=self.start_date, end_date=self.end_date),
+            'ERNAM': fake.user_name()[:12],
+            'SPERR': '' if random.random() > 0.05 else 'X',
+            'LOEVM': '' if random.random() > 0.02 else 'X'
+        }
+        
+        # LFB1 - Vendor Company Code Data
+        for company_code in COMPANY_CODES[region]:
+            vendor_company = {
+                'LIFNR': vendor_id,
+                'BUKRS': company_code,
+                'AKONT': random.choice(['2100000', '2110000', '2120000']),
+                'ZTERM': random.choice(PAYMENT_TERMS),
+                'REPRF': '' if random.random() > 0.1 else 'X',
+                'ZWELS': random.choice(['C', 'T', 'U']),
+                'ZAHLS': '' if random.random() > 0.05 else 'B',
+                'FDGRV': '',
+                'SPERR': '' if random.random() > 0.03 else 'X'
+            }
+            vendor_company_data.append(vendor_company)
+        
+        # LFM1 - Vendor Purchasing Data
+        vendor_purchasing = {
+            'LIFNR': vendor_id,
+            'EKORG': f"{region}00",
+            'SPERM': '' if random.random() > 0.05 else 'X',
+            'LIFER': fake.lexify('???????????'),
+            'LIBES': '' if random.random() > 0.1 else 'X',
+            'LIPRE': '' if random.random() > 0.15 else 'X',
+            'LISER': '' if random.random() > 0.2 else 'X',
+            'ZTERM': random.choice(PAYMENT_TERMS),
+            'INCO1': random.choice(['EXW', 'FCA', 'CPT', 'CIP', 'DAP', 'DDP']),
+            'INCO2': fake.city()[:28],
+            'WAERS': currency
+        }
+        
+        return vendor, vendor_company_data, vendor_purchasing
+    
     def generate_vendors(self, count=200):
         """Generate LFA1 (Vendor Master), LFB1 (Vendor Company Data), LFM1 (Vendor Purchasing Data)"""
         vendors = []
@@ -82,93 +1195,46 @@ class SAPDataGenerator:
         vendor_purchasing_data = []
         
         for i in range(count):
-            vendor_id = f"V{10000 + i:06d}"
-            region = random.choice(list(REGIONS.keys()))
-            country = random.choice(REGIONS[region])
-            currency = random.choice(CURRENCIES)
-            
-            # LFA1 - Vendor Master
-            vendor = {
-                'LIFNR': vendor_id,
-                'NAME1': fake.company()[:35],
-                'SORTL': fake.lexify('????').upper(),
-                'STRAS': fake.street_address()[:35],
-                'ORT01': fake.city()[:35],
-                'PSTLZ': fake.postcode()[:10],
-                'LAND1': country,
-                'SPRAS': 'EN',
-                'TELF1': fake.phone_number()[:16],
-                'TELFX': fake.phone_number()[:16],
-                'SMTP_ADDR': fake.company_email()[:50],
-                'KTOKK': 'Z001',
-                'ERDAT': fake.date_between(start_date=START_DATE, end_date=END_DATE),
-                'ERNAM': fake.user_name()[:12],
-                'SPERR': '' if random.random() > 0.05 else 'X',
-                'LOEVM': '' if random.random() > 0.02 else 'X'
-            }
+            vendor, company_rows, vendor_purchasing = self.vendor_rows(i)
             vendors.append(vendor)
-            
-            # LFB1 - Vendor Company Code Data
-            for company_code in COMPANY_CODES[region]:
-                vendor_company = {
-                    'LIFNR': vendor_id,
-                    'BUKRS': company_code,
-                    'AKONT': random.choice(['2100000', '2110000', '2120000']),
-                    'ZTERM': random.choice(PAYMENT_TERMS),
-                    'REPRF': '' if random.random() > 0.1 else 'X',
-                    'ZWELS': random.choice(['C', 'T', 'U']),
-                    'ZAHLS': '' if random.random() > 0.05 else 'B',
-                    'FDGRV': '',
-                    'SPERR': '' if random.random() > 0.03 else 'X'
-                }
-                vendor_company_data.append(vendor_company)
-            
-            # LFM1 - Vendor Purchasing Data
-            vendor_purchasing = {
-                'LIFNR': vendor_id,
-                'EKORG': f"{region}00",
-                'SPERM': '' if random.random() > 0.05 else 'X',
-                'LIFER': fake.lexify('???????????'),
-                'LIBES': '' if random.random() > 0.1 else 'X',
-                'LIPRE': '' if random.random() > 0.15 else 'X',
-                'LISER': '' if random.random() > 0.2 else 'X',
-                'ZTERM': random.choice(PAYMENT_TERMS),
-                'INCO1': random.choice(['EXW', 'FCA', 'CPT', 'CIP', 'DAP', 'DDP']),
-                'INCO2': fake.city()[:28],
-                'WAERS': currency
-            }
+            vendor_company_data.extend(company_rows)
             vendor_purchasing_data.append(vendor_purchasing)
         
         return vendors, vendor_company_data, vendor_purchasing_data
     
+    def customer_row(self, i):
+        """Generate customer i (KNA1)"""
+        customer_id = f"C{20000 + i:06d}"
+        region = random.choice(list(REGIONS.keys()))
+        country = random.choice(REGIONS[region])
+        
+        customer = {
+            'KUNNR': customer_id,
+            'NAME1': fake.company()[:35],
+            'SORTL': fake.lexify('????').upper(),
+            'STRAS': fake.street_address()[:35],
+            'ORT01': fake.city()[:35],
+            'PSTLZ': fake.postcode()[:10],
+            'LAND1': country,
+            'SPRAS': 'EN',
+            'TELF1': fake.phone_number()[:16],
+            'TELFX': fake.phone_number()[:16],
+            'SMTP_ADDR': fake.company_email()[:50],
+            'KTOKD': 'Z001',
+            'ERDAT': fake.date_between(start_date=self.start_date, end_date=self.end_date),
+            'ERNAM': fake.user_name()[:12],
+            'SPERR': '' if random.random() > 0.03 else 'X',
+            'LOEVM': '' if random.random() > 0.01 else 'X'
+        }
+        
+        return customer
+    
     def generate_customers(self, count=150):
         """Generate KNA1 (Customer Master)"""
         customers = []
         
         for i in range(count):
-            customer_id = f"C{20000 + i:06d}"
-            region = random.choice(list(REGIONS.keys()))
-            country = random.choice(REGIONS[region])
-            
-            customer = {
-                'KUNNR': customer_id,
-                'NAME1': fake.company()[:35],
-                'SORTL': fake.lexify('????').upper(),
-                'STRAS': fake.street_address()[:35],
-                'ORT01': fake.city()[:35],
-                'PSTLZ': fake.postcode()[:10],
-                'LAND1': country,
-                'SPRAS': 'EN',
-                'TELF1': fake.phone_number()[:16],
-                'TELFX': fake.phone_number()[:16],
-                'SMTP_ADDR': fake.company_email()[:50],
-                'KTOKD': 'Z001',
-                'ERDAT': fake.date_between(start_date=START_DATE, end_date=END_DATE),
-                'ERNAM': fake.user_name()[:12],
-                'SPERR': '' if random.random() > 0.03 else 'X',
-                'LOEVM': '' if random.random() > 0.01 else 'X'
-            }
-            customers.append(customer)
+            customers.append(self.customer_row(i))
         
         return customers
     
@@ -205,156 +1271,379 @@ class SAPDataGenerator:
         
         return payment_terms
     
+    @property
+    def exchange_rates(self):
+        """ExchangeRateIndex for the data range, built on first use"""
+        if self.exchange_rate_index is None:
+            self.exchange_rate_index = ExchangeRateIndex(self.start_date, self.end_date, self.seed)
+        return self.exchange_rate_index
+    
+    def local_amount(self, amount, currency, company_code, posting_date):
+        """Translate a document currency amount into the company code currency"""
+        return self.exchange_rates.convert(amount, currency, COMPANY_CODE_CURRENCIES[company_code], posting_date)
+    
+    def generate_company_codes(self):
+        """Generate T001 (Company Codes) with their local currency"""
+        return [
+            {
+                'BUKRS': company_code,
+                'BUTXT': f"SAP Demo {region} {company_code}",
+                'WAERS': COMPANY_CODE_CURRENCIES[company_code]
+            }
+            for region, company_codes in COMPANY_CODES.items()
+            for company_code in company_codes
+        ]
+    
+    def generate_exchange_rates(self):
+        """Generate TCURR (Exchange Rates): daily rates into every local currency"""
+        local_currencies = sorted(set(COMPANY_CODE_CURRENCIES.values()))
+        return self.exchange_rates.records(local_currencies)
+    
+    def index_item(self, line):
+        """Route a vendor/customer BSEG line to BSIK/BSAK or BSID/BSAD by clearing status"""
+        table_name = ITEM_INDEX_TABLES[(line['KOART'], line['AUGDT'] is not None)]
+        self.item_indexes[table_name].append({
+            'BUKRS': line['BUKRS'],
+            ITEM_INDEX_PARTNER_FIELDS[line['KOART']]: line['KONTO'],
+            'AUGDT': line['AUGDT'],
+            'AUGBL': line['AUGBL'],
+            'GJAHR': line['GJAHR'],
+            'BELNR': line['BELNR'],
+            'BUZEI': line['BUZEI'],
+            'BUDAT': line['BUDAT'],
+            'BLDAT': line['BLDAT'],
+            'WAERS': line['WAERS'],
+            'SHKZG': line['SHKZG'],
+            'DMBTR': line['DMBTR'],
+            'WRBTR': line['WRBTR'],
+            'ZTERM': line['ZTERM'],
+            'ZFBDT': line['BLDAT'],
+            'ZBD1T': line['ZBD1T']
+        })
+    
+    def index_lines(self, lines):
+        """Index the vendor and customer lines of one document's BSEG lines"""
+        for line in lines:
+            if line['KOART'] != 'S':
+                self.index_item(line)
+    
+    def purchase_order_rows(self, vendors, i):
+        """Generate purchase order i (EKKO) and its 1-5 items (EKPO)"""
+        po_items = []
+        
+        po_number = f"P{40000000 + i:010d}"
+        vendor = self.draw_partner(vendors)
+        region = [k for k, v in REGIONS.items() if vendor['LAND1'] in v][0]
+        company_code = self.draw_company_code(region)
+        
+        # Weight PO dates toward analysis focus year (2024) but allow full range
+        order_date = self.draw_document_date()
+        
+        # Determine approval status and workflow
+        approval_status = random.choices(
+            ['approved', 'pending', 'rejected'],
+            weights=[85, 10, 5]
+        )[0]
+        
+        po_header = {
+            'EBELN': po_number,
+            'BUKRS': company_code,
+            'BSTYP': 'F',
+            'BSART': random.choice(['NB', 'UB', 'FO']),
+            'LIFNR': vendor['LIFNR'],
+            'EKORG': f"{region[:2]}00",
+            'EKGRP': f"{region[:2]}01",
+            'WAERS': random.choice(CURRENCIES),
+            'BEDAT': order_date,
+            'KDATB': order_date + timedelta(days=random.randint(1, 30)),
+            'KDATE': order_date + timedelta(days=random.randint(60, 365)),
+            'ZTERM': random.choice(PAYMENT_TERMS),
+            'INCO1': random.choice(['EXW', 'FCA', 'CPT', 'CIP', 'DAP', 'DDP']),
+            'INCO2': fake.city()[:28],
+            'ERNAM': fake.user_name()[:12],
+            'AEDAT': order_date,
+            'FRGKE': 'X' if approval_status == 'approved' else '',
+            'FRGZU': approval_status.upper(),
+            'PROCSTAT': '05' if approval_status == 'approved' else ('03' if approval_status == 'pending' else '01'),
+            'MEMORY': '' if random.random() > 0.1 else 'X'
+        }
+        
+        # Generate 1-5 line items per PO
+        num_items = random.randint(1, 5)
+        for item_num in range(1, num_items + 1):
+            po_item = {
+                'EBELN': po_number,
+                'EBELP': f"{item_num:05d}",
+                'MATNR': f"M{random.randint(100000, 999999):06d}",
+                'TXZ01': fake.catch_phrase()[:40],
+                'MENGE': round(random.uniform(1, 1000), 2),
+                'MEINS': random.choice(['EA', 'KG', 'M', 'L', 'PC']),
+                'NETPR': round(random.uniform(10, 5000), 2),
+                'PEINH': 1,
+                'NETWR': 0,
+                'WERKS': f"{company_code[:2]}01",
+                'LGORT': '0001',
+                'MATKL': f"0{random.randint(1000, 9999)}",
+                'KOSTL': random.choice(COST_CENTERS[region]),
+                'EINDT': order_date + timedelta(days=random.randint(7, 60)),
+                'UEBTK': '' if random.random() > 0.1 else 'X',
+                'UNTTO': round(random.uniform(0, 10), 1),
+                'UEBTO': round(random.uniform(0, 10), 1),
+                'EREKZ': '' if random.random() > 0.05 else 'X',
+                'REPOS': '' if random.random() > 0.03 else 'X'
+            }
+            po_item['NETWR'] = round(po_item['MENGE'] * po_item['NETPR'], 2)
+            po_items.append(po_item)
+        
+        return po_header, po_items
+    
     def generate_purchase_orders(self, vendors, count=1500):
         """Generate EKKO (Purchase Order Header) and EKPO (Purchase Order Items)"""
         po_headers = []
         po_items = []
         
         for i in range(count):
-            po_number = f"P{40000000 + i:010d}"
-            vendor = random.choice(vendors)
-            region = [k for k, v in REGIONS.items() if vendor['LAND1'] in v][0]
-            company_code = random.choice(COMPANY_CODES[region])
-            
-            # Weight PO dates toward analysis focus year (2024) but allow full range
-            if random.random() < 0.7:
-                focus_start = date(ANALYSIS_FOCUS_YEAR, 1, 1)
-                focus_end = date(ANALYSIS_FOCUS_YEAR, 12, 31)
-                order_date = fake.date_between(start_date=focus_start, end_date=focus_end)
-            else:
-                order_date = fake.date_between(start_date=START_DATE, end_date=END_DATE)
-            
-            # Determine approval status and workflow
-            approval_status = random.choices(
-                ['approved', 'pending', 'rejected'],
-                weights=[85, 10, 5]
-            )[0]
-            
-            po_header = {
-                'EBELN': po_number,
-                'BUKRS': company_code,
-                'BSTYP': 'F',
-                'BSART': random.choice(['NB', 'UB', 'FO']),
-                'LIFNR': vendor['LIFNR'],
-                'EKORG': f"{region[:2]}00",
-                'EKGRP': f"{region[:2]}01",
-                'WAERS': random.choice(CURRENCIES),
-                'BEDAT': order_date,
-                'KDATB': order_date + timedelta(days=random.randint(1, 30)),
-                'KDATE': order_date + timedelta(days=random.randint(60, 365)),
-                'ZTERM': random.choice(PAYMENT_TERMS),
-                'INCO1': random.choice(['EXW', 'FCA', 'CPT', 'CIP', 'DAP', 'DDP']),
-                'INCO2': fake.city()[:28],
-                'ERNAM': fake.user_name()[:12],
-                'AEDAT': order_date,
-                'FRGKE': 'X' if approval_status == 'approved' else '',
-                'FRGZU': approval_status.upper(),
-                'PROCSTAT': '05' if approval_status == 'approved' else ('03' if approval_status == 'pending' else '01'),
-                'MEMORY': '' if random.random() > 0.1 else 'X'
-            }
+            po_header, items = self.purchase_order_rows(vendors, i)
             po_headers.append(po_header)
-            
-            # Generate 1-5 line items per PO
-            num_items = random.randint(1, 5)
-            for item_num in range(1, num_items + 1):
-                po_item = {
-                    'EBELN': po_number,
-                    'EBELP': f"{item_num:05d}",
-                    'MATNR': f"M{random.randint(100000, 999999):06d}",
-                    'TXZ01': fake.catch_phrase()[:40],
-                    'MENGE': round(random.uniform(1, 1000), 2),
-                    'MEINS': random.choice(['EA', 'KG', 'M', 'L', 'PC']),
-                    'NETPR': round(random.uniform(10, 5000), 2),
-                    'PEINH': 1,
-                    'NETWR': 0,
-                    'WERKS': f"{company_code[:2]}01",
-                    'LGORT': '0001',
-                    'MATKL': f"0{random.randint(1000, 9999)}",
-                    'KOSTL': random.choice(COST_CENTERS[region]),
-                    'EINDT': order_date + timedelta(days=random.randint(7, 60)),
-                    'UEBTK': '' if random.random() > 0.1 else 'X',
-                    'UNTTO': round(random.uniform(0, 10), 1),
-                    'UEBTO': round(random.uniform(0, 10), 1),
-                    'EREKZ': '' if random.random() > 0.05 else 'X',
-                    'REPOS': '' if random.random() > 0.03 else 'X'
-                }
-                po_item['NETWR'] = round(po_item['MENGE'] * po_item['NETPR'], 2)
-                po_items.append(po_item)
+            po_items.extend(items)
         
         return po_headers, po_items
     
-    def generate_vendor_invoices(self, po_headers, po_items, count=2000):
-        """Generate RBKP (Vendor Invoice Header) and related documents"""
-        invoices = []
+    def vendor_invoice_rows(self, i, po, po_items_for_po):
+        """Generate vendor invoice i (RBKP) for a PO and its BSEG lines"""
         accounting_docs = []
         
-        # Filter approved POs
-        approved_pos = [po for po in po_headers if po['FRGKE'] == 'X']
+        # Convert PO date to date object
+        po_date = safe_date_convert(po['BEDAT'])
         
-        for i in range(count):
-            po = random.choice(approved_pos)
-            po_items_for_po = [item for item in po_items if item['EBELN'] == po['EBELN']]
-            
-            # Convert PO date to date object
-            po_date = safe_date_convert(po['BEDAT'])
-            
-            # Generate invoice 1-45 days after PO (realistic processing time)
-            invoice_date = fake.date_between(
-                start_date=po_date + timedelta(days=1),
-                end_date=min(po_date + timedelta(days=45), END_DATE)
-            )
-            
-            # Simulate approval workflow
-            approval_status = random.choices(
-                ['approved', 'pending', 'rejected', 'parked'],
-                weights=[70, 15, 5, 10]
+        # Generate invoice 1-45 days after PO (realistic processing time),
+        # on the last day itself for POs dated at the end of the range
+        invoice_date = self.draw_day_between(
+            start_date=min(po_date + timedelta(days=1), self.end_date),
+            end_date=min(po_date + timedelta(days=45), self.end_date)
+        )
+        
+        # Simulate approval workflow
+        approval_status = random.choices(
+            ['approved', 'pending', 'rejected', 'parked'],
+            weights=[70, 15, 5, 10]
+        )[0]
+        
+        invoice_number = f"INV{50000000 + i:010d}"
+        vendor_invoice_ref = fake.lexify('???-#######')
+        
+        total_amount = sum([item['NETWR'] for item in po_items_for_po])
+        tax_amount = round(total_amount * random.uniform(0.05, 0.25), 2)
+        
+        invoice = {
+            'BELNR': invoice_number,
+            'BUKRS': po['BUKRS'],
+            'GJAHR': invoice_date.year,
+            'BLART': 'RE',
+            'BLDAT': invoice_date,
+            'BUDAT': invoice_date,
+            'XBLNR': vendor_invoice_ref,
+            'LIFNR': po['LIFNR'],
+            'WAERS': po['WAERS'],
+            'RMWWR': total_amount,
+            'WMWST1': tax_amount,
+            'EBELN': po['EBELN'],
+            'USNAM': fake.user_name()[:12],
+            'CPUDT': invoice_date,
+            'CPUTM': fake.time(end_datetime=datetime.combine(self.end_date, datetime.min.time())),
+            'TCODE': 'MIRO',
+            'STBLG': '' if approval_status != 'rejected' else invoice_number,
+            'STJAH': '' if approval_status != 'rejected' else str(invoice_date.year)
+        }
+        
+        # Generate BSEG entries for the invoice
+        line_item_counter = 1
+        
+        # Vendor line (credit)
+        vendor_line = {
+            'BUKRS': po['BUKRS'],
+            'BELNR': invoice_number,
+            'GJAHR': invoice_date.year,
+            'BUZEI': f"{line_item_counter:03d}",
+            'KOART': 'K',
+            'KONTO': po['LIFNR'],
+            'DMBTR': self.local_amount(-(total_amount + tax_amount), po['WAERS'], po['BUKRS'], invoice_date),
+            'WRBTR': -(total_amount + tax_amount),
+            'SHKZG': 'H',
+            'WAERS': po['WAERS'],
+            'ZTERM': po['ZTERM'],
+            'ZBD1T': PAYMENT_TERMS_DAYS[po['ZTERM']],
+            'BLDAT': invoice_date,
+            'BUDAT': invoice_date,
+            'KOSTL': '',
+            'AUGDT': None,
+            'AUGBL': ''
+        }
+        
+        # Calculate payment due date
+        payment_due = invoice_date + timedelta(days=PAYMENT_TERMS_DAYS[po['ZTERM']])
+        
+        # Realistic payment simulation
+        if approval_status == 'approved' and random.random() < 0.8:
+            payment_behavior = random.choices(
+                ['early_on_time', 'late'],
+                weights=[75, 25]
             )[0]
             
-            invoice_number = f"INV{50000000 + i:010d}"
-            vendor_invoice_ref = fake.lexify('???-#######')
-            
-            total_amount = sum([item['NETWR'] for item in po_items_for_po])
-            tax_amount = round(total_amount * random.uniform(0.05, 0.25), 2)
+            if payment_behavior == 'early_on_time':
+                payment_start = invoice_date + timedelta(days=max(1, PAYMENT_TERMS_DAYS[po['ZTERM']] - 5))
+                payment_end = payment_due + timedelta(days=PAYMENT_GRACE_DAYS['K'])
+            else:
+                payment_start = payment_due + timedelta(days=PAYMENT_GRACE_DAYS['K'] + 1)
+                payment_end = payment_due + timedelta(days=60)
             
-            invoice = {
-                'BELNR': invoice_number,
+            # Generate payment if date falls within our data range
+            if payment_start <= self.end_date:
+                actual_payment_end = min(payment_end, self.end_date)
+                if payment_start <= actual_payment_end:
+                    payment_date = fake.date_between(
+                        start_date=payment_start,
+                        end_date=actual_payment_end
+                    )
+                    vendor_line['AUGDT'] = payment_date
+                    vendor_line['AUGBL'] = f"PAY{random.randint(10000000, 99999999):08d}"
+        
+        accounting_docs.append(vendor_line)
+        line_item_counter += 1
+        
+        # Expense lines (debit)
+        for po_item in po_items_for_po:
+            expense_line = {
                 'BUKRS': po['BUKRS'],
+                'BELNR': invoice_number,
                 'GJAHR': invoice_date.year,
-                'BLART': 'RE',
+                'BUZEI': f"{line_item_counter:03d}",
+                'KOART': 'S',
+                'KONTO': random.choice(['6000000', '6100000', '6200000']),
+                'DMBTR': self.local_amount(po_item['NETWR'], po['WAERS'], po['BUKRS'], invoice_date),
+                'WRBTR': po_item['NETWR'],
+                'SHKZG': 'S',
+                'WAERS': po['WAERS'],
+                'ZTERM': '',
+                'ZBD1T': 0,
                 'BLDAT': invoice_date,
                 'BUDAT': invoice_date,
-                'XBLNR': vendor_invoice_ref,
-                'LIFNR': po['LIFNR'],
-                'WAERS': po['WAERS'],
-                'RMWWR': total_amount,
-                'WMWST1': tax_amount,
-                'EBELN': po['EBELN'],
-                'USNAM': fake.user_name()[:12],
-                'CPUDT': invoice_date,
-                'CPUTM': fake.time(),
-                'TCODE': 'MIRO',
-                'STBLG': '' if approval_status != 'rejected' else invoice_number,
-                'STJAH': '' if approval_status != 'rejected' else str(invoice_date.year)
+                'KOSTL': po_item['KOSTL'],
+                'AUGDT': None,
+                'AUGBL': ''
             }
-            invoices.append(invoice)
-            
-            # Generate BSEG entries for the invoice
-            line_item_counter = 1
-            
-            # Vendor line (credit)
-            vendor_line = {
+            accounting_docs.append(expense_line)
+            line_item_counter += 1
+        
+        # Tax line (debit)
+        if tax_amount > 0:
+            tax_line = {
                 'BUKRS': po['BUKRS'],
                 'BELNR': invoice_number,
                 'GJAHR': invoice_date.year,
                 'BUZEI': f"{line_item_counter:03d}",
-                'KOART': 'K',
-                'KONTO': po['LIFNR'],
-                'DMBTR': -(total_amount + tax_amount),
-                'WRBTR': -(total_amount + tax_amount),
-                'SHKZG': 'H',
+                'KOART': 'S',
+                'KONTO': '1500000',
+                'DMBTR': self.local_amount(tax_amount, po['WAERS'], po['BUKRS'], invoice_date),
+                'WRBTR': tax_amount,
+                'SHKZG': 'S',
                 'WAERS': po['WAERS'],
-                'ZTERM': po['ZTERM'],
-                'ZBD1T': PAYMENT_TERMS_DAYS[po['ZTERM']],
+                'ZTERM': '',
+                'ZBD1T': 0,
+                'BLDAT': invoice_date,
+                'BUDAT': invoice_date,
+                'KOSTL': '',
+                'AUGDT': None,
+                'AUGBL': ''
+            }
+            accounting_docs.append(tax_line)
+        
+        return invoice, accounting_docs
+    
+    def generate_vendor_invoices(self, po_headers, po_items, count=2000):
+        """Generate RBKP (Vendor Invoice Header) and related documents
+        
+        Vendor lines are also routed to BSIK/BSAK in self.item_indexes.
+        """
+        invoices = []
+        accounting_docs = []
+        
+        # Filter approved POs
+        approved_pos = [po for po in po_headers if po['FRGKE'] == 'X']
+        if count and not approved_pos:
+            raise ValueError("No approved purchase orders to invoice; increase the purchase_orders volume")
+        
+        # Index PO items by PO number once instead of scanning EKPO per invoice
+        items_by_po = {}
+        for item in po_items:
+            items_by_po.setdefault(item['EBELN'], []).append(item)
+        
+        for i in range(count):
+            po = random.choice(approved_pos)
+            invoice, lines = self.vendor_invoice_rows(i, po, items_by_po.get(po['EBELN'], []))
+            invoices.append(invoice)
+            accounting_docs.extend(lines)
+            self.index_lines(lines)
+        
+        return invoices, accounting_docs
+    
+    def sales_invoice_rows(self, customers, i):
+        """Generate sales invoice i (VBRK) and, once released, its BSEG lines"""
+        sales_accounting = []
+        
+        customer = self.draw_partner(customers)
+        region = [k for k, v in REGIONS.items() if customer['LAND1'] in v][0]
+        company_code = self.draw_company_code(region)
+        
+        # Weight invoice dates toward analysis focus year (2024) but allow full range
+        invoice_date = self.draw_document_date()
+        
+        invoice_number = f"90{random.randint(10000000, 99999999):08d}"
+        
+        net_amount = round(random.uniform(1000, 50000), 2)
+        tax_rate = random.uniform(0.05, 0.25)
+        tax_amount = round(net_amount * tax_rate, 2)
+        gross_amount = net_amount + tax_amount
+        
+        # Sales invoice header
+        sales_invoice = {
+            'VBELN': invoice_number,
+            'FKART': 'F2',
+            'FKDAT': invoice_date,
+            'BUKRS': company_code,
+            'KUNRG': customer['KUNNR'],
+            'KUNAG': customer['KUNNR'],
+            'WAERK': random.choice(CURRENCIES),
+            'NETWR': net_amount,
+            'MWSBP': tax_amount,
+            'RFBSK': 'C' if random.random() < 0.95 else 'A',
+            'ERDAT': invoice_date,
+            'ERNAM': fake.user_name()[:12],
+            'FKSTO': '' if random.random() > 0.02 else 'X',
+            'VBTYP': 'M',
+            'SFAKN': '',
+            'KNUMV': f"{random.randint(1000000000, 9999999999):010d}"
+        }
+        
+        # Generate accounting entries if released
+        if sales_invoice['RFBSK'] == 'C':
+            accounting_doc_number = f"AC{random.randint(10000000, 99999999):08d}"
+            selected_payment_terms = random.choice(PAYMENT_TERMS)
+            
+            # Customer receivable (debit)
+            customer_line = {
+                'BUKRS': company_code,
+                'BELNR': accounting_doc_number,
+                'GJAHR': invoice_date.year,
+                'BUZEI': '001',
+                'KOART': 'D',
+                'KONTO': customer['KUNNR'],
+                'DMBTR': self.local_amount(gross_amount, sales_invoice['WAERK'], company_code, invoice_date),
+                'WRBTR': gross_amount,
+                'SHKZG': 'S',
+                'WAERS': sales_invoice['WAERK'],
+                'ZTERM': selected_payment_terms,
+                'ZBD1T': PAYMENT_TERMS_DAYS[selected_payment_terms],
                 'BLDAT': invoice_date,
                 'BUDAT': invoice_date,
                 'KOSTL': '',
@@ -363,73 +1652,70 @@ class SAPDataGenerator:
             }
             
             # Calculate payment due date
-            payment_due = invoice_date + timedelta(days=PAYMENT_TERMS_DAYS[po['ZTERM']])
+            payment_due = invoice_date + timedelta(days=PAYMENT_TERMS_DAYS[selected_payment_terms])
             
-            # Realistic payment simulation
-            if approval_status == 'approved' and random.random() < 0.8:
+            # Realistic customer payment simulation
+            if random.random() < 0.75:
                 payment_behavior = random.choices(
                     ['early_on_time', 'late'],
-                    weights=[75, 25]
+                    weights=[67, 33]
                 )[0]
                 
                 if payment_behavior == 'early_on_time':
-                    payment_start = invoice_date + timedelta(days=max(1, PAYMENT_TERMS_DAYS[po['ZTERM']] - 5))
-                    payment_end = payment_due + timedelta(days=10)
+                    payment_start = invoice_date + timedelta(days=max(1, PAYMENT_TERMS_DAYS[selected_payment_terms] - 3))
+                    payment_end = payment_due + timedelta(days=PAYMENT_GRACE_DAYS['D'])
                 else:
-                    payment_start = payment_due + timedelta(days=11)
-                    payment_end = payment_due + timedelta(days=60)
+                    payment_start = payment_due + timedelta(days=PAYMENT_GRACE_DAYS['D'] + 1)
+                    payment_end = payment_due + timedelta(days=90)
                 
                 # Generate payment if date falls within our data range
-                if payment_start <= END_DATE:
-                    actual_payment_end = min(payment_end, END_DATE)
+                if payment_start <= self.end_date:
+                    actual_payment_end = min(payment_end, self.end_date)
                     if payment_start <= actual_payment_end:
                         payment_date = fake.date_between(
                             start_date=payment_start,
                             end_date=actual_payment_end
                         )
-                        vendor_line['AUGDT'] = payment_date
-                        vendor_line['AUGBL'] = f"PAY{random.randint(10000000, 99999999):08d}"
+                        customer_line['AUGDT'] = payment_date
+                        customer_line['AUGBL'] = f"REC{random.randint(10000000, 99999999):08d}"
             
-            accounting_docs.append(vendor_line)
-            line_item_counter += 1
+            sales_accounting.append(customer_line)
             
-            # Expense lines (debit)
-            for po_item in po_items_for_po:
-                expense_line = {
-                    'BUKRS': po['BUKRS'],
-                    'BELNR': invoice_number,
-                    'GJAHR': invoice_date.year,
-                    'BUZEI': f"{line_item_counter:03d}",
-                    'KOART': 'S',
-                    'KONTO': random.choice(['6000000', '6100000', '6200000']),
-                    'DMBTR': po_item['NETWR'],
-                    'WRBTR': po_item['NETWR'],
-                    'SHKZG': 'S',
-                    'WAERS': po['WAERS'],
-                    'ZTERM': '',
-                    'ZBD1T': 0,
-                    'BLDAT': invoice_date,
-                    'BUDAT': invoice_date,
-                    'KOSTL': po_item['KOSTL'],
-                    'AUGDT': None,
-                    'AUGBL': ''
-                }
-                accounting_docs.append(expense_line)
-                line_item_counter += 1
+            # Revenue (credit)
+            revenue_line = {
+                'BUKRS': company_code,
+                'BELNR': accounting_doc_number,
+                'GJAHR': invoice_date.year,
+                'BUZEI': '002',
+                'KOART': 'S',
+                'KONTO': random.choice(['4000000', '4100000', '4200000']),
+                'DMBTR': self.local_amount(-net_amount, sales_invoice['WAERK'], company_code, invoice_date),
+                'WRBTR': -net_amount,
+                'SHKZG': 'H',
+                'WAERS': sales_invoice['WAERK'],
+                'ZTERM': '',
+                'ZBD1T': 0,
+                'BLDAT': invoice_date,
+                'BUDAT': invoice_date,
+                'KOSTL': random.choice(COST_CENTERS[region]),
+                'AUGDT': None,
+                'AUGBL': ''
+            }
+            sales_accounting.append(revenue_line)
             
-            # Tax line (debit)
+            # Output tax (credit)
             if tax_amount > 0:
                 tax_line = {
-                    'BUKRS': po['BUKRS'],
-                    'BELNR': invoice_number,
+                    'BUKRS': company_code,
+                    'BELNR': accounting_doc_number,
                     'GJAHR': invoice_date.year,
-                    'BUZEI': f"{line_item_counter:03d}",
+                    'BUZEI': '003',
                     'KOART': 'S',
-                    'KONTO': '1500000',
-                    'DMBTR': tax_amount,
-                    'WRBTR': tax_amount,
-                    'SHKZG': 'S',
-                    'WAERS': po['WAERS'],
+                    'KONTO': '2300000',
+                    'DMBTR': self.local_amount(-tax_amount, sales_invoice['WAERK'], company_code, invoice_date),
+                    'WRBTR': -tax_amount,
+                    'SHKZG': 'H',
+                    'WAERS': sales_invoice['WAERK'],
                     'ZTERM': '',
                     'ZBD1T': 0,
                     'BLDAT': invoice_date,
@@ -438,178 +1724,68 @@ class SAPDataGenerator:
                     'AUGDT': None,
                     'AUGBL': ''
                 }
-                accounting_docs.append(tax_line)
+                sales_accounting.append(tax_line)
         
-        return invoices, accounting_docs
+        return sales_invoice, sales_accounting
     
     def generate_sales_invoices(self, customers, count=1800):
-        """Generate VBRK (Billing Document Header) and related accounting entries"""
+        """Generate VBRK (Billing Document Header) and related accounting entries
+        
+        Customer lines are also routed to BSID/BSAD in self.item_indexes.
+        """
         sales_invoices = []
         sales_accounting = []
         
         for i in range(count):
-            customer = random.choice(customers)
-            region = [k for k, v in REGIONS.items() if customer['LAND1'] in v][0]
-            company_code = random.choice(COMPANY_CODES[region])
-            
-            # Weight invoice dates toward analysis focus year (2024) but allow full range
-            if random.random() < 0.7:
-                focus_start = date(ANALYSIS_FOCUS_YEAR, 1, 1)
-                focus_end = date(ANALYSIS_FOCUS_YEAR, 12, 31)
-                invoice_date = fake.date_between(start_date=focus_start, end_date=focus_end)
-            else:
-                invoice_date = fake.date_between(start_date=START_DATE, end_date=END_DATE)
-            
-            invoice_number = f"90{random.randint(10000000, 99999999):08d}"
-            
-            net_amount = round(random.uniform(1000, 50000), 2)
-            tax_rate = random.uniform(0.05, 0.25)
-            tax_amount = round(net_amount * tax_rate, 2)
-            gross_amount = net_amount + tax_amount
-            
-            # Sales invoice header
-            sales_invoice = {
-                'VBELN': invoice_number,
-                'FKART': 'F2',
-                'FKDAT': invoice_date,
-                'BUKRS': company_code,
-                'KUNRG': customer['KUNNR'],
-                'KUNAG': customer['KUNNR'],
-                'WAERK': random.choice(CURRENCIES),
-                'NETWR': net_amount,
-                'MWSBP': tax_amount,
-                'RFBSK': 'C' if random.random() < 0.95 else 'A',
-                'ERDAT': invoice_date,
-                'ERNAM': fake.user_name()[:12],
-                'FKSTO': '' if random.random() > 0.02 else 'X',
-                'VBTYP': 'M',
-                'SFAKN': '',
-                'KNUMV': f"{random.randint(1000000000, 9999999999):010d}"
-            }
+            sales_invoice, lines = self.sales_invoice_rows(customers, i)
             sales_invoices.append(sales_invoice)
-            
-            # Generate accounting entries if released
-            if sales_invoice['RFBSK'] == 'C':
-                accounting_doc_number = f"AC{random.randint(10000000, 99999999):08d}"
-                selected_payment_terms = random.choice(PAYMENT_TERMS)
-                
-                # Customer receivable (debit)
-                customer_line = {
-                    'BUKRS': company_code,
-                    'BELNR': accounting_doc_number,
-                    'GJAHR': invoice_date.year,
-                    'BUZEI': '001',
-                    'KOART': 'D',
-                    'KONTO': customer['KUNNR'],
-                    'DMBTR': gross_amount,
-                    'WRBTR': gross_amount,
-                    'SHKZG': 'S',
-                    'WAERS': sales_invoice['WAERK'],
-                    'ZTERM': selected_payment_terms,
-                    'ZBD1T': PAYMENT_TERMS_DAYS[selected_payment_terms],
-                    'BLDAT': invoice_date,
-                    'BUDAT': invoice_date,
-                    'KOSTL': '',
-                    'AUGDT': None,
-                    'AUGBL': ''
-                }
-                
-                # Calculate payment due date
-                payment_due = invoice_date + timedelta(days=PAYMENT_TERMS_DAYS[selected_payment_terms])
-                
-                # Realistic customer payment simulation
-                if random.random() < 0.75:
-                    payment_behavior = random.choices(
-                        ['early_on_time', 'late'],
-                        weights=[67, 33]
-                    )[0]
-                    
-                    if payment_behavior == 'early_on_time':
-                        payment_start = invoice_date + timedelta(days=max(1, PAYMENT_TERMS_DAYS[selected_payment_terms] - 3))
-                        payment_end = payment_due + timedelta(days=15)
-                    else:
-                        payment_start = payment_due + timedelta(days=16)
-                        payment_end = payment_due + timedelta(days=90)
-                    
-                    # Generate payment if date falls within our data range
-                    if payment_start <= END_DATE:
-                        actual_payment_end = min(payment_end, END_DATE)
-                        if payment_start <= actual_payment_end:
-                            payment_date = fake.date_between(
-                                start_date=payment_start,
-                                end_date=actual_payment_end
-                            )
-                            customer_line['AUGDT'] = payment_date
-                            customer_line['AUGBL'] = f"REC{random.randint(10000000, 99999999):08d}"
-                
-                sales_accounting.append(customer_line)
-                
-                # Revenue (credit)
-                revenue_line = {
-                    'BUKRS': company_code,
-                    'BELNR': accounting_doc_number,
-                    'GJAHR': invoice_date.year,
-                    'BUZEI': '002',
-                    'KOART': 'S',
-                    'KONTO': random.choice(['4000000', '4100000', '4200000']),
-                    'DMBTR': -net_amount,
-                    'WRBTR': -net_amount,
-                    'SHKZG': 'H',
-                    'WAERS': sales_invoice['WAERK'],
-                    'ZTERM': '',
-                    'ZBD1T': 0,
-                    'BLDAT': invoice_date,
-                    'BUDAT': invoice_date,
-                    'KOSTL': random.choice(COST_CENTERS[region]),
-                    'AUGDT': None,
-                    'AUGBL': ''
-                }
-                sales_accounting.append(revenue_line)
-                
-                # Output tax (credit)
-                if tax_amount > 0:
-                    tax_line = {
-                        'BUKRS': company_code,
-                        'BELNR': accounting_doc_number,
-                        'GJAHR': invoice_date.year,
-                        'BUZEI': '003',
-                        'KOART': 'S',
-                        'KONTO': '2300000',
-                        'DMBTR': -tax_amount,
-                        'WRBTR': -tax_amount,
-                        'SHKZG': 'H',
-                        'WAERS': sales_invoice['WAERK'],
-                        'ZTERM': '',
-                        'ZBD1T': 0,
-                        'BLDAT': invoice_date,
-                        'BUDAT': invoice_date,
-                        'KOSTL': '',
-                        'AUGDT': None,
-                        'AUGBL': ''
-                    }
-                    sales_accounting.append(tax_line)
+            sales_accounting.extend(lines)
+            self.index_lines(lines)
         
         return sales_invoices, sales_accounting
     
+    def run_stage(self, stage, message, function, *args):
+        """Run one generation step, recording its wall time in self.stage_seconds"""
+        print(message)
+        started = time.perf_counter()
+        result = function(*args)
+        self.stage_seconds[stage] = time.perf_counter() - started
+        return result
+    
     def generate_all_data(self):
         """Generate all SAP data and return as dictionaries"""
-        print("Generating vendors...")
-        vendors, vendor_company_data, vendor_purchasing_data = self.generate_vendors()
-        
-        print("Generating customers...")
-        customers = self.generate_customers()
-        
-        print("Generating payment terms...")
-        payment_terms = self.generate_payment_terms()
-        
-        print("Generating purchase orders...")
-        po_headers, po_items = self.generate_purchase_orders(vendors)
+        if self.seed is not None:
+            random.seed(self.seed)
+            fake.seed_instance(self.seed)
         
-        print("Generating vendor invoices...")
-        vendor_invoices, vendor_accounting = self.generate_vendor_invoices(po_headers, po_items)
+        self.item_indexes = {table_name: [] for table_name in ITEM_INDEX_TABLES.values()}
         
-        print("Generating sales invoices...")
-        sales_invoices, sales_accounting = self.generate_sales_invoices(customers)
+        self.stage_seconds = {}
+        vendors, vendor_company_data, vendor_purchasing_data = self.run_stage(
+            'vendors', "Generating vendors...", self.generate_vendors, self.volumes['vendors']
+        )
+        customers = self.run_stage(
+            'customers', "Generating customers...", self.generate_customers, self.volumes['customers']
+        )
+        payment_terms = self.run_stage(
+            'payment_terms', "Generating payment terms...", self.generate_payment_terms
+        )
+        company_codes, exchange_rates = self.run_stage(
+            'exchange_rates', "Generating company codes and exchange rates...",
+            lambda: (self.generate_company_codes(), self.generate_exchange_rates())
+        )
+        po_headers, po_items = self.run_stage(
+            'purchase_orders', "Generating purchase orders...", self.generate_purchase_orders,
+            vendors, self.volumes['purchase_orders']
+        )
+        vendor_invoices, vendor_accounting = self.run_stage(
+            'vendor_invoices', "Generating vendor invoices...", self.generate_vendor_invoices,
+            po_headers, po_items, self.volumes['vendor_invoices']
+        )
+        sales_invoices, sales_accounting = self.run_stage(
+            'sales_invoices', "Generating sales invoices...", self.generate_sales_invoices,
+            customers, self.volumes['sales_invoices']
+        )
         
         # Combine all accounting entries
         all_accounting = vendor_accounting + sales_accounting
@@ -620,325 +1796,1548 @@ class SAPDataGenerator:
             'LFM1': vendor_purchasing_data,
             'KNA1': customers,
             'T052': payment_terms,
+            'T001': company_codes,
+            'TCURR': exchange_rates,
             'EKKO': po_headers,
             'EKPO': po_items,
             'RBKP': vendor_invoices,
             'VBRK': sales_invoices,
-            'BSEG': all_accounting
+            'BSEG': all_accounting,
+            'BSIK': self.item_indexes['BSIK'],
+            'BSAK': self.item_indexes['BSAK'],
+            'BSID': self.item_indexes['BSID'],
+            'BSAD': self.item_indexes['BSAD']
         }
     
-    def create_sql_script(self, data):
-        """Generate SQL script to create tables and insert data"""
+    def seed_row(self, entity, index):
+        """Reseed random and the Faker stream from keyed hashes of (seed, entity, row index)
+        
+        The two streams get separate derivations: seeded alike they would
+        produce the same numbers, tying the columns drawn from random (region,
+        country) to those drawn by Faker (name format, city).
+        """
+        for stream, derivation in ((random, f"{entity}:{index}"), (self.row_random, f"{entity}:{index}:faker")):
+            digest = hashlib.blake2b(derivation.encode(), digest_size=8, key=str(self.seed).encode()).digest()
+            stream.seed(int.from_bytes(digest, 'big'))
+    
+    def counter_row(self, entity, index):
+        """Generate row index of an entity from its own random stream (counter-based mode)"""
+        self.seed_row(entity, index)
+        if entity == 'vendors':
+            return self.vendor_rows(index)
+        if entity == 'customers':
+            return (self.customer_row(index),)
+        if entity == 'purchase_orders':
+            return self.purchase_order_rows(self.counter_tables['vendors'], index)
+        if entity == 'vendor_invoices':
+            po, po_items = self.draw_approved_po()
+            return self.vendor_invoice_rows(index, po, po_items)
+        return self.sales_invoice_rows(self.counter_tables['customers'], index)
+    
+    def draw_approved_po(self, attempts=100):
+        """Pick a uniformly random approved purchase order by rejection sampling"""
+        purchase_orders = self.counter_tables['purchase_orders']
+        for _ in range(attempts):
+            po, po_items = purchase_orders.entry(random.randrange(len(purchase_orders)))
+            if po['FRGKE'] == 'X':
+                return po, po_items
+        raise ValueError(f"No approved purchase order found in {attempts} draws")
+    
+    def generate_rows(self, selection=None, closure=True, reference_tables=True):
+        """Counter-based generation of selected rows, without generating the rows before them
+        
+        selection maps TABLE_VOLUMES keys to row indices (every row when
+        omitted). Each row is generated from random and Faker, each reseeded
+        with its own keyed hash of (seed, entity, index). Its foreign keys
+        (LIFNR, EBELN, KUNNR) are drawn from the row's random stream and
+        resolved by generating the referenced row on demand. Any row therefore has the
+        same values whichever selection it is generated in, at O(selection)
+        cost. With closure the referenced vendors, customers and purchase
+        orders are included; without it, disjoint selections (see
+        shard_selection) together form the complete dataset. Values differ
+        from generate_all_data, which draws from one sequential stream.
+        """
+        if self.seed is None:
+            raise ValueError("Counter-based generation requires a fixed seed")
+        if selection is None:
+            selection = {entity: range(count) for entity, count in self.volumes.items()}
+        unknown = set(selection) - set(TABLE_VOLUMES)
+        if unknown:
+            raise ValueError(f"Unknown entities in selection: {', '.join(sorted(unknown))}")
+        
+        self.counter_tables = {entity: CounterRows(self, entity, self.volumes[entity]) for entity in TABLE_VOLUMES}
+        self.item_indexes = {table_name: [] for table_name in ITEM_INDEX_TABLES.values()}
+        included = {entity: sorted(set(selection.get(entity, ()))) for entity in TABLE_VOLUMES}
+        
+        # Faker's locale factories share one row stream for the duration
+        saved_state = random.getstate()
+        saved_randoms = [factory.random for factory in fake.factories]
+        for factory in fake.factories:
+            factory.random = self.row_random
+        try:
+            for entity, indices in included.items():
+                for index in indices:
+                    self.counter_tables[entity].entry(index)
+        finally:
+            random.setstate(saved_state)
+            for factory, factory_random in zip(fake.factories, saved_randoms):
+                factory.random = factory_random
+        
+        def entries(entity):
+            return [self.counter_tables[entity].entries[index] for index in included[entity]]
+        
+        if closure:
+            # Every referenced row was generated while drawing the foreign key
+            po_index = self.counter_tables['purchase_orders'].index_by('EBELN')
+            included['purchase_orders'] = sorted(set(included['purchase_orders']) | {
+                po_index[invoice['EBELN']] for invoice, _ in entries('vendor_invoices')
+            })
+            vendor_index = self.counter_tables['vendors'].index_by('LIFNR')
+            included['vendors'] = sorted(set(included['vendors']) | {
+                vendor_index[po['LIFNR']] for po, _ in entries('purchase_orders')
+            })
+            customer_index = self.counter_tables['customers'].index_by('KUNNR')
+            included['customers'] = sorted(set(included['customers']) | {
+                customer_index[invoice['KUNRG']] for invoice, _ in entries('sales_invoices')
+            })
+        
+        vendors = entries('vendors')
+        purchase_orders = entries('purchase_orders')
+        vendor_invoices = entries('vendor_invoices')
+        sales_invoices = entries('sales_invoices')
+        accounting = [line for _, lines in vendor_invoices + sales_invoices for line in lines]
+        for _, lines in vendor_invoices + sales_invoices:
+            self.index_lines(lines)
+        
+        return {
+            'LFA1': [vendor for vendor, _, _ in vendors],
+            'LFB1': [row for _, company_rows, _ in vendors for row in company_rows],
+            'LFM1': [purchasing for _, _, purchasing in vendors],
+            'KNA1': [customer for customer, in entries('customers')],
+            'T052': self.generate_payment_terms() if reference_tables else [],
+            'T001': self.generate_company_codes() if reference_tables else [],
+            'TCURR': self.generate_exchange_rates() if reference_tables else [],
+            'EKKO': [po for po, _ in purchase_orders],
+            'EKPO': [item for _, po_items in purchase_orders for item in po_items],
+            'RBKP': [invoice for invoice, _ in vendor_invoices],
+            'VBRK': [invoice for invoice, _ in sales_invoices],
+            'BSEG': accounting,
+            'BSIK': self.item_indexes['BSIK'],
+            'BSAK': self.item_indexes['BSAK'],
+            'BSID': self.item_indexes['BSID'],
+            'BSAD': self.item_indexes['BSAD']
+        }
+    
+    def create_sql_script(self, data, profile=SQL_SCRIPT_PROFILE, engine=SQL_TARGET_ENGINE, shard=None):
+        """Generate SQL script to create tables and insert data
+        
+        The 'import' profile wraps each table's inserts in one transaction,
+        sets load-time pragmas for the target engine and sizes each INSERT
+        from the engine's statement limits instead of a fixed 100 rows.
+        A (K, N) shard changes the header (see create_sql_header).
+        """
+        sql_script = self.create_sql_header(profile, engine, shard)
+        
+        # Add data insertion statements
+        for table_name, records in data.items():
+            sql_script += self.create_insert_statements(table_name, records, profile, engine)
+        
+        return sql_script + self.create_sql_footer(profile, engine)
+    
+    def create_sql_header(self, profile=SQL_SCRIPT_PROFILE, engine=SQL_TARGET_ENGINE, shard=None):
+        """Generate the script preamble: pragmas and table creation statements
+        
+        For a (K, N) shard only shard 0 creates the tables, and foreign key
+        checks are switched off: a shard's rows reference rows of other
+        shards, so the keys only hold once all N shards are loaded.
+        """
+        if profile not in ('default', 'import'):
+            raise ValueError(f"Unknown SQL script profile: {profile}")
+        if engine not in SQL_ENGINE_LIMITS:
+            raise ValueError(f"Unknown SQL target engine: {engine}")
+        
         sql_script = """
 -- SAP Dummy Data SQL Script
 -- Generated for PowerBI Dashboard Demo
 
--- Enable foreign key constraints
-PRAGMA foreign_keys = ON;
-
 """
         
-        # Table creation statements
-        table_definitions = {
-            'LFA1': """
-CREATE TABLE LFA1 (
-    LIFNR VARCHAR(10) PRIMARY KEY,    -- Vendor account number
-    NAME1 VARCHAR(35),                -- Name 1
-    SORTL VARCHAR(10),                -- Sort field
-    STRAS VARCHAR(35),                -- Street address
-    ORT01 VARCHAR(35),                -- City
-    PSTLZ VARCHAR(10),                -- Postal code
-    LAND1 VARCHAR(3),                 -- Country key
-    SPRAS VARCHAR(1),                 -- Language key
-    TELF1 VARCHAR(16),                -- Telephone 1
-    TELFX VARCHAR(31),                -- Fax number
-    SMTP_ADDR VARCHAR(241),           -- Email address
-    KTOKK VARCHAR(4),                 -- Vendor account group
-    ERDAT DATE,                       -- Created on
-    ERNAM VARCHAR(12),                -- Created by
-    SPERR VARCHAR(1),                 -- Central posting block
-    LOEVM VARCHAR(1)                  -- Central deletion flag
-);
-""",
-            'LFB1': """
-CREATE TABLE LFB1 (
-    LIFNR VARCHAR(10),                -- Vendor account number
-    BUKRS VARCHAR(4),                 -- Company code
-    AKONT VARCHAR(10),                -- Reconciliation account
-    ZTERM VARCHAR(4),                 -- Payment terms
-    REPRF VARCHAR(1),                 -- Double invoice check
-    ZWELS VARCHAR(10),                -- Payment methods
-    ZAHLS VARCHAR(1),                 -- Payment block
-    FDGRV VARCHAR(10),                -- Planning group
-    SPERR VARCHAR(1),                 -- Posting block
-    PRIMARY KEY (LIFNR, BUKRS),
-    FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR)
-);
-""",
-            'LFM1': """
-CREATE TABLE LFM1 (
-    LIFNR VARCHAR(10),                -- Vendor account number
-    EKORG VARCHAR(4),                 -- Purchasing organization
-    SPERM VARCHAR(1),                 -- Purchasing block
-    LIFER VARCHAR(35),                -- Vendor sub-range
-    LIBES VARCHAR(1),                 -- Order confirmation required
-    LIPRE VARCHAR(1),                 -- Price comparison
-    LISER VARCHAR(1),                 -- Service-based invoice verification
-    ZTERM VARCHAR(4),                 -- Payment terms
-    INCO1 VARCHAR(3),                 -- Incoterms part 1
-    INCO2 VARCHAR(28),                -- Incoterms part 2
-    WAERS VARCHAR(5),                 -- Currency
-    PRIMARY KEY (LIFNR, EKORG),
-    FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR)
-);
-""",
-            'KNA1': """
-CREATE TABLE KNA1 (
-    KUNNR VARCHAR(10) PRIMARY KEY,    -- Customer number
-    NAME1 VARCHAR(35),                -- Name 1
-    SORTL VARCHAR(10),                -- Sort field
-    STRAS VARCHAR(35),                -- Street address
-    ORT01 VARCHAR(35),                -- City
-    PSTLZ VARCHAR(10),                -- Postal code
-    LAND1 VARCHAR(3),                 -- Country key
-    SPRAS VARCHAR(1),                 -- Language key
-    TELF1 VARCHAR(16),                -- Telephone 1
-    TELFX VARCHAR(31),                -- Fax number
-    SMTP_ADDR VARCHAR(241),           -- Email address
-    KTOKD VARCHAR(4),                 -- Customer account group
-    ERDAT DATE,                       -- Created on
-    ERNAM VARCHAR(12),                -- Created by
-    SPERR VARCHAR(1),                 -- Central posting block
-    LOEVM VARCHAR(1)                  -- Central deletion flag
-);
-""",
-            'T052': """
-CREATE TABLE T052 (
-    ZTERM VARCHAR(4) PRIMARY KEY,     -- Payment terms key
-    SPRAS VARCHAR(1),                 -- Language
-    TEXT1 VARCHAR(50),                -- Description
-    ZTAG1 INTEGER,                    -- Days 1
-    ZPRZ1 DECIMAL(5,3),              -- Percentage 1
-    ZMTAG INTEGER,                    -- Additional months
-    ZTAG2 INTEGER,                    -- Days 2
-    ZPRZ2 DECIMAL(5,3),              -- Percentage 2
-    ZTAG3 INTEGER,                    -- Days 3
-    ZPRZ3 DECIMAL(5,3)               -- Percentage 3
-);
-""",
-            'EKKO': """
-CREATE TABLE EKKO (
-    EBELN VARCHAR(10) PRIMARY KEY,    -- Purchase document number
-    BUKRS VARCHAR(4),                 -- Company code
-    BSTYP VARCHAR(1),                 -- Purchasing document category
-    BSART VARCHAR(4),                 -- Purchasing document type
-    LIFNR VARCHAR(10),                -- Vendor account number
-    EKORG VARCHAR(4),                 -- Purchasing organization
-    EKGRP VARCHAR(3),                 -- Purchasing group
-    WAERS VARCHAR(5),                 -- Currency
-    BEDAT DATE,                       -- Purchase document date
-    KDATB DATE,                       -- Validity start date
-    KDATE DATE,                       -- Validity end date
-    ZTERM VARCHAR(4),                 -- Payment terms
-    INCO1 VARCHAR(3),                 -- Incoterms part 1
-    INCO2 VARCHAR(28),                -- Incoterms part 2
-    ERNAM VARCHAR(12),                -- Created by
-    AEDAT DATE,                       -- Changed on
-    FRGKE VARCHAR(1),                 -- Release indicator
-    FRGZU VARCHAR(2),                 -- Release state
-    PROCSTAT VARCHAR(2),              -- Procurement process status
-    MEMORY VARCHAR(1),                -- Incomplete indicator
-    FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR),
-    FOREIGN KEY (ZTERM) REFERENCES T052(ZTERM)
-);
-""",
-            'EKPO': """
-CREATE TABLE EKPO (
-    EBELN VARCHAR(10),                -- Purchase document number
-    EBELP VARCHAR(5),                 -- Purchase document item number
-    MATNR VARCHAR(18),                -- Material number
-    TXZ01 VARCHAR(40),                -- Short text
-    MENGE DECIMAL(13,3),              -- Purchase order quantity
-    MEINS VARCHAR(3),                 -- Order unit
-    NETPR DECIMAL(11,2),              -- Net price
-    PEINH DECIMAL(5,0),               -- Price unit
-    NETWR DECIMAL(13,2),              -- Net order value
-    WERKS VARCHAR(4),                 -- Plant
-    LGORT VARCHAR(4),                 -- Storage location
-    MATKL VARCHAR(9),                 -- Material group
-    KOSTL VARCHAR(10),                -- Cost center
-    EINDT DATE,                       -- Delivery date
-    UEBTK VARCHAR(1),                 -- Unlimited overdelivery allowed
-    UNTTO DECIMAL(3,1),               -- Underdelivery tolerance
-    UEBTO DECIMAL(3,1),               -- Overdelivery tolerance
-    EREKZ VARCHAR(1),                 -- Final invoice indicator
-    REPOS VARCHAR(1),                 -- Invoice receipt indicator
-    PRIMARY KEY (EBELN, EBELP),
-    FOREIGN KEY (EBELN) REFERENCES EKKO(EBELN)
-);
-""",
-            'RBKP': """
-CREATE TABLE RBKP (
-    BELNR VARCHAR(10),                -- Document number
-    BUKRS VARCHAR(4),                 -- Company code
-    GJAHR INTEGER,                    -- Fiscal year
-    BLART VARCHAR(2),                 -- Document type
-    BLDAT DATE,                       -- Document date
-    BUDAT DATE,                       -- Posting date
-    XBLNR VARCHAR(16),                -- Reference document number
-    LIFNR VARCHAR(10),                -- Vendor account number
-    WAERS VARCHAR(5),                 -- Currency
-    RMWWR DECIMAL(13,2),              -- Gross invoice amount
-    WMWST1 DECIMAL(13,2),             -- Tax amount
-    EBELN VARCHAR(10),                -- Purchase order number
-    USNAM VARCHAR(12),                -- User name
-    CPUDT DATE,                       -- Entry date
-    CPUTM TIME,                       -- Entry time
-    TCODE VARCHAR(20),                -- Transaction code
-    STBLG VARCHAR(10),                -- Reversal document number
-    STJAH INTEGER,                    -- Reversal fiscal year
-    PRIMARY KEY (BELNR, BUKRS, GJAHR),
-    FOREIGN KEY (LIFNR) REFERENCES LFA1(LIFNR),
-    FOREIGN KEY (EBELN) REFERENCES EKKO(EBELN)
-);
-""",
-            'VBRK': """
-CREATE TABLE VBRK (
-    VBELN VARCHAR(10) PRIMARY KEY,    -- Billing document
-    FKART VARCHAR(4),                 -- Billing type
-    FKDAT DATE,                       -- Billing date
-    BUKRS VARCHAR(4),                 -- Company code
-    KUNRG VARCHAR(10),                -- Payer
-    KUNAG VARCHAR(10),                -- Sold-to party
-    WAERK VARCHAR(5),                 -- Currency
-    NETWR DECIMAL(15,2),              -- Net value
-    MWSBP DECIMAL(13,2),              -- Tax amount
-    RFBSK VARCHAR(1),                 -- Status for transfer to accounting
-    ERDAT DATE,                       -- Created on
-    ERNAM VARCHAR(12),                -- Created by
-    FKSTO VARCHAR(1),                 -- Billing document is cancelled
-    VBTYP VARCHAR(1),                 -- Document category
-    SFAKN VARCHAR(10),                -- Cancellation document
-    KNUMV VARCHAR(10),                -- Document condition
-    FOREIGN KEY (KUNRG) REFERENCES KNA1(KUNNR),
-    FOREIGN KEY (KUNAG) REFERENCES KNA1(KUNNR)
-);
-""",
-            'BSEG': """
-CREATE TABLE BSEG (
-    BUKRS VARCHAR(4),                 -- Company code
-    BELNR VARCHAR(10),                -- Document number
-    GJAHR INTEGER,                    -- Fiscal year
-    BUZEI VARCHAR(3),                 -- Line item number
-    KOART VARCHAR(1),                 -- Account type
-    KONTO VARCHAR(10),                -- Account number
-    DMBTR DECIMAL(13,2),              -- Amount in local currency
-    WRBTR DECIMAL(13,2),              -- Amount in document currency
-    SHKZG VARCHAR(1),                 -- Debit/Credit indicator
-    WAERS VARCHAR(5),                 -- Currency
-    ZTERM VARCHAR(4),                 -- Payment terms
-    ZBD1T INTEGER,                    -- Cash discount days 1
-    BLDAT DATE,                       -- Document date
-    BUDAT DATE,                       -- Posting date
-    KOSTL VARCHAR(10),                -- Cost center
-    AUGDT DATE,                       -- Clearing date
-    AUGBL VARCHAR(10),                -- Clearing document
-    PRIMARY KEY (BUKRS, BELNR, GJAHR, BUZEI),
-    FOREIGN KEY (ZTERM) REFERENCES T052(ZTERM)
-);
-"""
-        }
+        if shard is None:
+            foreign_keys = SQL_ENGINE_LIMITS[engine]['foreign_keys']
+            if foreign_keys:
+                sql_script += "-- Enable foreign key constraints\n" + '\n'.join(foreign_keys) + "\n\n"
+        else:
+            sql_script += f"-- Shard {shard[0]} of {shard[1]}: load shard 0 first, then the other shards in any order\n"
+            sql_script += "-- Foreign keys reference other shards; check them after all shards are loaded\n"
+            sql_script += '\n'.join(SQL_ENGINE_LIMITS[engine]['foreign_keys_off'] + ['']) + "\n"
+        
+        if profile == 'import':
+            sql_script += f"-- Load-time settings for {engine} (reset at end of script)\n"
+            sql_script += '\n'.join(SQL_ENGINE_LIMITS[engine]['prologue']) + "\n\n"
         
         # Add table creation statements
-        for table_name, create_stmt in table_definitions.items():
-            sql_script += create_stmt + "\n"
-        
-        # Define standard field structure for each table
-        standard_fields = {
-            'LFA1': ['LIFNR', 'NAME1', 'SORTL', 'STRAS', 'ORT01', 'PSTLZ', 'LAND1', 'SPRAS', 'TELF1', 'TELFX', 'SMTP_ADDR', 'KTOKK', 'ERDAT', 'ERNAM', 'SPERR', 'LOEVM'],
-            'LFB1': ['LIFNR', 'BUKRS', 'AKONT', 'ZTERM', 'REPRF', 'ZWELS', 'ZAHLS', 'FDGRV', 'SPERR'],
-            'LFM1': ['LIFNR', 'EKORG', 'SPERM', 'LIFER', 'LIBES', 'LIPRE', 'LISER', 'ZTERM', 'INCO1', 'INCO2', 'WAERS'],
-            'KNA1': ['KUNNR', 'NAME1', 'SORTL', 'STRAS', 'ORT01', 'PSTLZ', 'LAND1', 'SPRAS', 'TELF1', 'TELFX', 'SMTP_ADDR', 'KTOKD', 'ERDAT', 'ERNAM', 'SPERR', 'LOEVM'],
-            'T052': ['ZTERM', 'SPRAS', 'TEXT1', 'ZTAG1', 'ZPRZ1', 'ZMTAG', 'ZTAG2', 'ZPRZ2', 'ZTAG3', 'ZPRZ3'],
-            'EKKO': ['EBELN', 'BUKRS', 'BSTYP', 'BSART', 'LIFNR', 'EKORG', 'EKGRP', 'WAERS', 'BEDAT', 'KDATB', 'KDATE', 'ZTERM', 'INCO1', 'INCO2', 'ERNAM', 'AEDAT', 'FRGKE', 'FRGZU', 'PROCSTAT', 'MEMORY'],
-            'EKPO': ['EBELN', 'EBELP', 'MATNR', 'TXZ01', 'MENGE', 'MEINS', 'NETPR', 'PEINH', 'NETWR', 'WERKS', 'LGORT', 'MATKL', 'KOSTL', 'EINDT', 'UEBTK', 'UNTTO', 'UEBTO', 'EREKZ', 'REPOS'],
-            'RBKP': ['BELNR', 'BUKRS', 'GJAHR', 'BLART', 'BLDAT', 'BUDAT', 'XBLNR', 'LIFNR', 'WAERS', 'RMWWR', 'WMWST1', 'EBELN', 'USNAM', 'CPUDT', 'CPUTM', 'TCODE', 'STBLG', 'STJAH'],
-            'VBRK': ['VBELN', 'FKART', 'FKDAT', 'BUKRS', 'KUNRG', 'KUNAG', 'WAERK', 'NETWR', 'MWSBP', 'RFBSK', 'ERDAT', 'ERNAM', 'FKSTO', 'VBTYP', 'SFAKN', 'KNUMV'],
-            'BSEG': ['BUKRS', 'BELNR', 'GJAHR', 'BUZEI', 'KOART', 'KONTO', 'DMBTR', 'WRBTR', 'SHKZG', 'WAERS', 'ZTERM', 'ZBD1T', 'BLDAT', 'BUDAT', 'KOSTL', 'AUGDT', 'AUGBL']
-        }
+        if shard is None or shard[0] == 0:
+            for table_name in TABLE_SCHEMAS:
+                sql_script += table_ddl(table_name) + "\n"
         
-        # Add data insertion statements
-        for table_name, records in data.items():
-            if records:
-                sql_script += f"\n-- Insert data into {table_name}\n"
-                
-                # Use standard field structure
-                columns = standard_fields.get(table_name, list(records[0].keys()))
-                columns_str = ', '.join(columns)
-                
-                sql_script += f"INSERT INTO {table_name} ({columns_str}) VALUES\n"
-                
-                value_statements = []
-                for record in records:
-                    values = []
-                    for col in columns:
-                        # Handle missing keys gracefully
-                        value = record.get(col, None)
-                        if value is None or value == '':
-                            values.append('NULL')
-                        elif isinstance(value, str):
-                            # Escape single quotes and limit length
-                            escaped_value = str(value).replace("'", "''")
-                            values.append(f"'{escaped_value}'")
-                        elif isinstance(value, (int, float)):
-                            values.append(str(value))
-                        elif isinstance(value, (datetime, date)):
-                            if hasattr(value, 'strftime'):
-                                values.append(f"'{value.strftime('%Y-%m-%d')}'")
-                            else:
-                                values.append(f"'{str(value)}'")
-                        else:
-                            values.append(f"'{str(value)}'")
-                    
-                    value_statements.append(f"({', '.join(values)})")
-                
-                # Split into chunks to avoid SQL statement size limits
-                chunk_size = 100
-                for i in range(0, len(value_statements), chunk_size):
-                    chunk = value_statements[i:i + chunk_size]
-                    if i == 0:
-                        sql_script += ',\n'.join(chunk)
-                    else:
-                        sql_script += f";\n\nINSERT INTO {table_name} ({columns_str}) VALUES\n"
-                        sql_script += ',\n'.join(chunk)
-                
-                sql_script += ";\n\n"
+        return sql_script
+    
+    def create_sql_footer(self, profile=SQL_SCRIPT_PROFILE, engine=SQL_TARGET_ENGINE):
+        """Generate the statements restoring engine settings after an 'import' script"""
+        if profile != 'import':
+            return ''
+        return "-- Restore default settings\n" + '\n'.join(SQL_ENGINE_LIMITS[engine]['epilogue']) + "\n"
+    
+    def create_insert_statements(self, table_name, records, profile=SQL_SCRIPT_PROFILE, engine=SQL_TARGET_ENGINE,
+                                 comment=True):
+        """Generate the INSERT statements for one table's records
+        
+        In the default profile the output for consecutive 100-row slices
+        concatenates to the output for the whole table when only the first
+        slice carries the comment, which the parallel writer relies on.
+        """
+        if not records:
+            return ''
+        
+        sql_script = f"\n-- Insert data into {table_name}\n" if comment else ''
+        
+        # Use the registry column order and its compiled serializer
+        if table_name in TABLE_SCHEMAS:
+            columns = table_columns(table_name)
+            serialize_row = compile_row_serializer(table_name)
+            value_statements = [serialize_row(record) for record in records]
+        else:
+            columns = list(records[0].keys())
+            value_statements = [
+                f"({', '.join(format_sql_value(record.get(col)) for col in columns)})"
+                for record in records
+            ]
+        columns_str = ', '.join(columns)
+        insert_header = f"INSERT INTO {table_name} ({columns_str}) VALUES\n"
         
+        if profile == 'import':
+            # One transaction per table, batches sized to the engine limits
+            sql_script += SQL_ENGINE_LIMITS[engine]['begin'] + "\n"
+            for batch in batch_value_statements(insert_header, value_statements, engine):
+                sql_script += insert_header + ',\n'.join(batch) + ";\n"
+            sql_script += "COMMIT;\n\n"
+            return sql_script
+        
+        # Split into chunks to avoid SQL statement size limits
+        sql_script += insert_header
+        chunk_size = 100
+        for i in range(0, len(value_statements), chunk_size):
+            chunk = value_statements[i:i + chunk_size]
+            if i == 0:
+                sql_script += ',\n'.join(chunk)
+            else:
+                sql_script += ";\n\n" + insert_header
+                sql_script += ',\n'.join(chunk)
+        
+        sql_script += ";\n\n"
         return sql_script
+    
+    def write_sql_script_parallel(self, data, path, profile=SQL_SCRIPT_PROFILE, engine=SQL_TARGET_ENGINE,
+                                  max_workers=SQL_WRITER_PROCESSES, segment_rows=SQL_SEGMENT_ROWS, shard=None):
+        """Write the same script as create_sql_script to path using a process pool
+        
+        Each table, or each segment_rows chunk of a large table in the default
+        profile, is serialized to its own segment file by a worker. Chunks
+        start on 100-row INSERT boundaries so their output concatenates to
+        the sequential output; 'import' batches are size-adaptive, so that
+        profile is split per table only. The segments are then appended in
+        DDL/FK order with os.copy_file_range (or os.sendfile), so their
+        contents are never read back through Python.
+        """
+        global WORKER_SOURCE_DATA
+        
+        header = self.create_sql_header(profile, engine, shard)
+        footer = self.create_sql_footer(profile, engine)
+        
+        tasks = []
+        for table_name, records in data.items():
+            step = len(records) if profile == 'import' else max(100, segment_rows - segment_rows % 100)
+            for start in range(0, len(records), step):
+                tasks.append((table_name, start, min(start + step, len(records)), start == 0))
+        
+        context = fork_context()
+        segment_dir = tempfile.mkdtemp(prefix='.sql-segments-', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            header_path = os.path.join(segment_dir, 'header.sql')
+            footer_path = os.path.join(segment_dir, 'footer.sql')
+            for segment_path, text in ((header_path, header), (footer_path, footer)):
+                with open(segment_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+            
+            WORKER_SOURCE_DATA = data if context else None
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                futures = [
+                    executor.submit(
+                        write_sql_segment, os.path.join(segment_dir, f"{i:06d}.sql"),
+                        table_name, start, stop, profile, engine, comment,
+                        None if context else data[table_name][start:stop]
+                    )
+                    for i, (table_name, start, stop, comment) in enumerate(tasks)
+                ]
+                segment_paths = [future.result() for future in futures]
+            
+            destination_fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                for segment_path in [header_path] + segment_paths + [footer_path]:
+                    append_file(destination_fd, segment_path)
+            finally:
+                os.close(destination_fd)
+        finally:
+            WORKER_SOURCE_DATA = None
+            shutil.rmtree(segment_dir, ignore_errors=True)
+        
+        return path
+    
+    def write_partition(self, table_name, records, directory, output_format, engine=SQL_TARGET_ENGINE):
+        """Write one partition's records to part-00000 in directory"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-00000{OUTPUT_FORMATS[output_format]}")
+        
+        if output_format == 'csv':
+            columns = table_columns(table_name) if table_name in TABLE_SCHEMAS else list(records[0].keys())
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows([format_csv_value(record.get(col)) for col in columns] for record in records)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.create_insert_statements(table_name, records, 'import', engine))
+        
+        return path
+    
+    def write_partitioned_output(self, data, output_dir=PARTITION_OUTPUT_DIR, output_format=PARTITION_FORMAT,
+                                 max_workers=PARTITION_WORKERS, engine=SQL_TARGET_ENGINE):
+        """Write every table to output_dir, splitting transactional tables into
+        Hive-style BUKRS=/GJAHR=/MONAT= partitions written by a process pool
+        
+        Master data tables are written as a single file per table. A
+        _manifest.json listing each partition's path and row count is
+        written last; SQL output for the target engine also gets a
+        _schema.sql with its foreign key statements and the DDL.
+        Formatting is CPU-bound, so partitions are written by max_workers
+        processes rather than threads. Everything is written to a fresh
+        sibling directory that then replaces output_dir, since loaders
+        discover partitions by listing directories and would otherwise pick
+        up partitions left by an earlier run.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        if engine not in SQL_ENGINE_LIMITS:
+            raise ValueError(f"Unknown SQL target engine: {engine}")
+        
+        # Group records by (table, partition values)
+        partitions = {}
+        for table_name, records in data.items():
+            for record in records:
+                values = partition_values(table_name, record) if table_name in PARTITIONED_TABLES else ()
+                partitions.setdefault((table_name, values), []).append(record)
+        
+        # Build next to output_dir so the final renames stay on one filesystem
+        output_dir = os.path.normpath(output_dir)
+        build_dir = f"{output_dir}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(build_dir)
+        try:
+            manifest = self.write_partitions(partitions, build_dir, output_format, max_workers, engine)
+        except BaseException:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+        
+        # Swap the new tree in, then drop the previous run's tree
+        stale_dir = f"{output_dir}.old-{uuid.uuid4().hex}"
+        if os.path.exists(output_dir):
+            os.replace(output_dir, stale_dir)
+        os.replace(build_dir, output_dir)
+        shutil.rmtree(stale_dir, ignore_errors=True)
+        
+        return manifest
+    
+    def write_partitions(self, partitions, output_dir, output_format, max_workers=PARTITION_WORKERS,
+                         engine=SQL_TARGET_ENGINE):
+        """Write grouped partitions, _schema.sql and _manifest.json into output_dir"""
+        global WORKER_SOURCE_DATA
+        
+        if output_format == 'sql':
+            with open(os.path.join(output_dir, '_schema.sql'), 'w', encoding='utf-8') as f:
+                f.write(''.join(statement + "\n" for statement in SQL_ENGINE_LIMITS[engine]['foreign_keys']))
+                for table_name in TABLE_SCHEMAS:
+                    f.write(table_ddl(table_name))
+        
+        context = fork_context()
+        WORKER_SOURCE_DATA = partitions if context else None
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                futures = {
+                    key: executor.submit(
+                        write_partition_file, key,
+                        os.path.join(output_dir, key[0], *[f"{column}={value}" for column, value in key[1]]),
+                        output_format, engine, None if context else records
+                    )
+                    for key, records in partitions.items()
+                }
+                paths = {key: future.result() for key, future in futures.items()}
+        finally:
+            WORKER_SOURCE_DATA = None
+        
+        manifest = {
+            'format': output_format,
+            'partition_columns': ['BUKRS', 'GJAHR', 'MONAT'],
+            'tables': {}
+        }
+        for (table_name, values), path in paths.items():
+            manifest['tables'].setdefault(table_name, []).append({
+                'path': os.path.relpath(path, output_dir),
+                'partition': dict(values),
+                'rows': len(partitions[(table_name, values)])
+            })
+        
+        with open(os.path.join(output_dir, '_manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        
+        return manifest
+    
+    def generate_event_stream(self, data):
+        """Yield business events from generated data in business-time order
+        
+        The tables themselves are already in memory. Each source (PO
+        created/released from EKKO, vendor invoice posted from RBKP with its
+        BSEG lines, sales invoice billed from VBRK and item cleared from BSEG
+        AUGDT/AUGBL) buckets its record indexes by day in one O(n) pass
+        instead of sorting the table, then yields day by day. heapq.merge
+        interleaves the sources lazily, so only the event being emitted is
+        built. Events on the same day follow EVENT_TYPES, then table order.
+        """
+        invoice_lines = {}
+        for line in data['BSEG']:
+            invoice_lines.setdefault((line['BUKRS'], line['BELNR'], line['GJAHR']), []).append(line)
+        
+        def source(event_type, table_name, records, date_field, keep=None):
+            priority = EVENT_TYPES.index(event_type)
+            days = {}
+            for i, record in enumerate(records):
+                if record.get(date_field) is not None and (keep is None or keep(record)):
+                    days.setdefault(record[date_field], []).append(i)
+            
+            # Only the distinct days are sorted, at most one per calendar day
+            for i in (i for day in sorted(days) for i in days.pop(day)):
+                record = records[i]
+                event = {
+                    'event_time': record[date_field],
+                    'event_type': event_type,
+                    'table': table_name,
+                    'data': record
+                }
+                if event_type == 'INVOICE_POSTED':
+                    event['items'] = invoice_lines.get((record['BUKRS'], record['BELNR'], record['GJAHR']), [])
+                yield record[date_field], priority, i, event
+        
+        sources = [
+            source('PO_CREATED', 'EKKO', data['EKKO'], 'BEDAT'),
+            source('PO_RELEASED', 'EKKO', data['EKKO'], 'BEDAT', keep=lambda po: po['FRGKE'] == 'X'),
+            source('INVOICE_POSTED', 'RBKP', data['RBKP'], 'BUDAT'),
+            source('SALES_INVOICE_BILLED', 'VBRK', data['VBRK'], 'FKDAT'),
+            source('ITEM_CLEARED', 'BSEG', data['BSEG'], 'AUGDT')
+        ]
+        for _, _, _, event in heapq.merge(*sources):
+            yield event
 
-def main():
-    """Main function to generate SAP data and create SQL script"""
-    generator = SAPDataGenerator()
+
+def python_hash_seed():
+    """Return this process's PYTHONHASHSEED, or None when str hashing is randomized
     
-    print("Starting SAP data generation...")
-    data = generator.generate_all_data()
+    Some Faker locales (e.g. it_IT cities) iterate over sets, so seeded
+    output is only reproducible under a fixed hash seed.
+    """
+    value = os.environ.get('PYTHONHASHSEED')
+    return None if value in (None, 'random') else value
+
+@lru_cache(maxsize=None)
+def generator_source_sha256():
+    """Return the SHA-256 of this module's source, so any code change changes cache keys"""
+    return file_sha256(os.path.abspath(__file__))
+
+def effective_config(seed=RANDOM_SEED, volumes=None, start_date=START_DATE, end_date=END_DATE,
+                     skew_profile=SKEW_PROFILE):
+    """Return every setting that influences the generated rows
+    
+    Besides GENERATOR_VERSION, the table schemas and the module source are
+    included, so tables or generator logic changed without a version bump
+    still miss the cache instead of restoring an outdated script.
+    """
+    return {
+        'generator_version': GENERATOR_VERSION,
+        'generator_source_sha256': generator_source_sha256(),
+        'table_schemas': TABLE_SCHEMAS,
+        'faker_version': faker.VERSION,
+        'python_hash_seed': python_hash_seed(),
+        'seed': seed,
+        'volumes': {**TABLE_VOLUMES, **(volumes or {})},
+        'start_date': start_date,
+        'end_date': end_date,
+        'analysis_focus_year': ANALYSIS_FOCUS_YEAR,
+        'distributions': {
+            'currencies': CURRENCIES,
+            'regions': REGIONS,
+            'payment_terms': PAYMENT_TERMS_DAYS,
+            'cost_centers': COST_CENTERS,
+            'company_codes': COMPANY_CODES,
+            'company_code_currencies': COMPANY_CODE_CURRENCIES,
+            'exchange_rates': BASE_EXCHANGE_RATES,
+            'exchange_rate_volatility': EXCHANGE_RATE_VOLATILITY,
+            'skew': SKEW_PROFILES[skew_profile],
+            'period_end_days': PERIOD_END_DAYS
+        }
+    }
+
+def config_hash(config):
+    """Return the SHA-256 content address of a configuration"""
+    canonical = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def file_sha256(path):
+    """Return the SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class DatasetCache:
+    """Local artifact cache addressed by configuration hash
+    
+    Each entry is a directory <cache_dir>/<key>/ holding the artifact files
+    and an entry.json with their SHA-256 and size, the table row counts, the
+    data profile state and the last use time. Artifacts are verified against their SHA-256 on every
+    reuse, and least recently used entries are evicted once the cache grows
+    beyond max_bytes.
+    """
+    
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+    
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+    
+    def read_entry(self, key):
+        """Return the entry.json contents for key, or None if missing or unreadable"""
+        try:
+            with open(os.path.join(self.entry_dir(key), 'entry.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def temp_path(self, key):
+        """Create a uniquely named temporary file in an entry, so that concurrent
+        writers of the same key never share one"""
+        fd, path = tempfile.mkstemp(dir=self.entry_dir(key), suffix='.tmp')
+        os.close(fd)
+        return path
+    
+    def write_entry(self, key, entry):
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        temp_path = self.temp_path(key)
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, indent=2)
+            os.replace(temp_path, os.path.join(self.entry_dir(key), 'entry.json'))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    def get(self, key, artifact):
+        """Return (path, entry) for a verified cached artifact, or None on a miss"""
+        entry = self.read_entry(key)
+        if entry is None or artifact not in entry['artifacts']:
+            return None
+        
+        path = os.path.join(self.entry_dir(key), artifact)
+        if not os.path.exists(path) or file_sha256(path) != entry['artifacts'][artifact]['sha256']:
+            # Corrupted or partially deleted entry: drop it and regenerate
+            self.remove(key)
+            return None
+        
+        entry['last_used'] = time.time()
+        self.write_entry(key, entry)
+        return path, entry
+    
+    def put(self, key, artifact, source_path, row_counts, profile=None):
+        """Copy source_path into the cache as artifact of entry key
+        
+        profile is the DataProfile state of the run, restored on a hit.
+        """
+        os.makedirs(self.entry_dir(key), exist_ok=True)
+        path = os.path.join(self.entry_dir(key), artifact)
+        temp_path = self.temp_path(key)
+        try:
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        
+        entry = self.read_entry(key) or {'key': key, 'artifacts': {}}
+        entry['artifacts'][artifact] = {
+            'sha256': file_sha256(path),
+            'bytes': os.path.getsize(path)
+        }
+        entry['row_counts'] = row_counts
+        if profile is not None:
+            entry['profile'] = profile
+        entry['last_used'] = time.time()
+        self.write_entry(key, entry)
+        
+        self.evict(keep=key)
+        return path
+    
+    def remove(self, key):
+        shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+    
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry = self.read_entry(key)
+            if entry is None:
+                continue
+            size = sum(artifact['bytes'] for artifact in entry['artifacts'].values())
+            entries.append((entry['last_used'], key, size))
+        
+        total_bytes = sum(size for _, _, size in entries)
+        for _, key, size in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.remove(key)
+            total_bytes -= size
+
+def sample_selection(fraction, seed, volumes=None):
+    """Select a reproducible fraction of every entity's rows for generate_rows, in O(sample)"""
+    rng = random.Random(f"{seed}:sample")
+    return {
+        entity: sorted(rng.sample(range(count), round(count * fraction)))
+        for entity, count in {**TABLE_VOLUMES, **(volumes or {})}.items()
+    }
+
+def shard_selection(shard, shards, volumes=None):
+    """Select shard (0-based) of shards contiguous, disjoint row ranges of every entity"""
+    if not 0 <= shard < shards:
+        raise ValueError(f"Shard {shard} out of range for {shards} shards")
+    return {
+        entity: range(count * shard // shards, count * (shard + 1) // shards)
+        for entity, count in {**TABLE_VOLUMES, **(volumes or {})}.items()
+    }
+
+def parse_shard(text):
+    """Parse a 'K/N' shard specification into (K, N), K counting from 0"""
+    try:
+        shard, shards = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r}, expected K/N") from None
+    if not 0 <= shard < shards:
+        raise ValueError(f"Shard {shard} out of range for {shards} shards")
+    return shard, shards
+
+def row_selection(seed, volumes=None, sample=None, shard=None):
+    """Return generate_rows arguments for a sample fraction or a (K, N) shard
+    
+    Samples keep referential closure; shards are disjoint so that together
+    they form the full dataset, with the reference tables in shard 0 only.
+    """
+    if sample is not None:
+        if not 0 < sample <= 1:
+            raise ValueError("sample must be a fraction in (0, 1]")
+        return {'selection': sample_selection(sample, seed, volumes)}
+    shard, shards = shard
+    return {'selection': shard_selection(shard, shards, volumes), 'closure': False, 'reference_tables': shard == 0}
+
+def generate_dataset(output_path, artifact='sql', seed=RANDOM_SEED, volumes=None,
+                     profile=SQL_SCRIPT_PROFILE, engine=SQL_TARGET_ENGINE, cache=None,
+                     start_date=START_DATE, end_date=END_DATE, skew_profile=SKEW_PROFILE,
+                     sample=None, shard=None, data_profile=None, load_records=False):
+    """Write a SQL script ('sql') or SQLite database ('sqlite') to output_path
+    
+    When a cache is given and the seed is fixed, a previous run with the same
+    effective configuration is copied from the cache instead of generating
+    again. The cache is only used under a pinned PYTHONHASHSEED, which is
+    part of the key, since a few Faker locales depend on it (see
+    python_hash_seed); a cache that cannot be used is skipped with a
+    RuntimeWarning. Returns (data, row_counts); data is None on a hit,
+    unless load_records is set: the records are then cached with the
+    artifact and loaded back on a hit.
+    
+    A sample fraction or a (K, N) shard switches to counter-based generation
+    (SAPDataGenerator.generate_rows); such runs bypass the cache. A given
+    data_profile (DataProfile) is fed every generated row, or the cached
+    profile on a hit.
+    """
+    if artifact not in ('sql', 'sqlite'):
+        raise ValueError(f"Unknown artifact: {artifact}")
+    if artifact == 'sqlite':
+        engine = 'sqlite'
+    if artifact == 'sqlite' and shard is not None:
+        raise ValueError("Shards are written as SQL scripts to load into one database; use artifact='sql'")
+    
+    counter_based = sample is not None or shard is not None
+    use_cache = cache is not None and seed is not None and not counter_based and python_hash_seed() is not None
+    if cache is not None and not use_cache:
+        if seed is None:
+            reason = "the seed is not fixed"
+        elif counter_based:
+            reason = "samples and shards are not cached"
+        else:
+            reason = "PYTHONHASHSEED is not set to a fixed value before starting Python"
+        warnings.warn(f"Dataset cache skipped: {reason}", RuntimeWarning, stacklevel=2)
+    key = config_hash(effective_config(seed, volumes, start_date, end_date, skew_profile))
+    artifact_name = f"sap_dummy_data.{profile}.{engine}" + ('.sql' if artifact == 'sql' else '.db')
+    
+    if use_cache:
+        cached = cache.get(key, artifact_name)
+        cached_records = cache.get(key, CACHE_RECORDS_ARTIFACT) if cached and load_records else None
+        if cached and (cached_records or not load_records):
+            print(f"Restoring dataset from cache ({cache.cache_dir})...")
+            path, entry = cached
+            shutil.copyfile(path, output_path)
+            if data_profile is not None and 'profile' in entry:
+                data_profile.merge(DataProfile.from_state(entry['profile']))
+            data = None
+            if cached_records:
+                with open(cached_records[0], 'rb') as f:
+                    data = pickle.load(f)
+            return data, entry['row_counts']
+    
+    generator = SAPDataGenerator(seed=seed, volumes=volumes, start_date=start_date, end_date=end_date,
+                                 skew_profile=skew_profile)
+    if counter_based:
+        print("Generating selected rows (counter-based)...")
+        data = generator.generate_rows(**row_selection(seed, volumes, sample, shard))
+    else:
+        data = generator.generate_all_data()
     
     print("Creating SQL script...")
-    sql_script = generator.create_sql_script(data)
+    if artifact == 'sql' and SQL_WRITER_PROCESSES > 1:
+        generator.write_sql_script_parallel(data, output_path, profile, engine, shard=shard)
+    elif artifact == 'sql':
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(generator.create_sql_script(data, profile, engine, shard))
+    else:
+        sql_script = generator.create_sql_script(data, profile, engine)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        connection = sqlite3.connect(output_path)
+        try:
+            connection.executescript(sql_script)
+        finally:
+            connection.close()
+    
+    row_counts = {table_name: len(records) for table_name, records in data.items()}
+    run_profile = None
+    if data_profile is not None:
+        print("Profiling generated rows...")
+        run_profile = DataProfile().add_dataset(data)
+        data_profile.merge(run_profile)
+    if use_cache:
+        cache.put(key, artifact_name, output_path, row_counts, run_profile and run_profile.state())
+        if load_records:
+            fd, records_path = tempfile.mkstemp(suffix='.pickle')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+                cache.put(key, CACHE_RECORDS_ARTIFACT, records_path, row_counts)
+            finally:
+                os.unlink(records_path)
+    
+    return data, row_counts
+
+def record_memory_bytes(record):
+    """Approximate in-memory size of one record dict and its values"""
+    return sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record.values())
+
+def available_memory_bytes():
+    """Return available physical memory, or None where it cannot be read"""
+    try:
+        with open('/proc/meminfo', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def expected_row_counts(volumes, start_date, end_date, vendor_cleared_share, customer_cleared_share):
+    """Expected rows per table from the volume settings and the generators' business rules"""
+    mean_company_codes = sum(len(codes) for codes in COMPANY_CODES.values()) / len(COMPANY_CODES)
+    mean_po_items = 3                       # 1-5 items per PO
+    released_share = 0.95                   # Sales invoices transferred to accounting (RFBSK = C)
+    days = (end_date - start_date).days + 1
+    local_currencies = set(COMPANY_CODE_CURRENCIES.values())
+    vendor_lines = volumes['vendor_invoices']
+    customer_lines = volumes['sales_invoices'] * released_share
+    
+    return {
+        'LFA1': volumes['vendors'],
+        'LFB1': volumes['vendors'] * mean_company_codes,
+        'LFM1': volumes['vendors'],
+        'KNA1': volumes['customers'],
+        'T052': len(PAYMENT_TERMS_DAYS),
+        'T001': len(COMPANY_CODE_CURRENCIES),
+        'TCURR': days * sum(len(BASE_EXCHANGE_RATES) - (currency in BASE_EXCHANGE_RATES) for currency in local_currencies),
+        'EKKO': volumes['purchase_orders'],
+        'EKPO': volumes['purchase_orders'] * mean_po_items,
+        'RBKP': volumes['vendor_invoices'],
+        'VBRK': volumes['sales_invoices'],
+        # Vendor document: vendor line, one expense line per PO item and a tax line;
+        # released sales document: customer, revenue and tax line
+        'BSEG': vendor_lines * (2 + mean_po_items) + customer_lines * 3,
+        'BSIK': vendor_lines * (1 - vendor_cleared_share),
+        'BSAK': vendor_lines * vendor_cleared_share,
+        'BSID': customer_lines * (1 - customer_cleared_share),
+        'BSAD': customer_lines * customer_cleared_share
+    }
+
+def plan_run(volumes=None, start_date=START_DATE, end_date=END_DATE, skew_profile=SKEW_PROFILE, output_dir='.',
+             artifact='sql'):
+    """Estimate rows, output bytes, peak memory and wall time of a run without generating it
+    
+    Row counts follow from the volumes and the generators' business rules,
+    with clearing shares taken from a short calibration run over the same
+    date window and skew profile. The calibration run also provides per-row
+    coefficients: generation seconds per volume unit for each stage, bytes
+    per row for each output format, memory per row and SQL serialization
+    seconds per row. The calibration leaves the random and Faker streams as
+    it found them. artifact is the generate_dataset artifact the memory
+    estimate is for. Returns a dict including a list of warnings.
+    """
+    volumes = {**TABLE_VOLUMES, **(volumes or {})}
+    
+    # Calibration run
+    generator = SAPDataGenerator(seed=0, volumes=PLAN_CALIBRATION_VOLUMES, start_date=start_date,
+                                 end_date=end_date, skew_profile=skew_profile)
+    saved_state = random.getstate()
+    saved_randoms = [(factory.random, factory.random.getstate()) for factory in fake.factories]
+    try:
+        sample = generator.generate_all_data()
+    finally:
+        # generate_all_data reseeds both streams; later unseeded runs must not repeat seed 0
+        random.setstate(saved_state)
+        for factory, (factory_random, factory_state) in zip(fake.factories, saved_randoms):
+            factory_random.setstate(factory_state)
+            factory.random = factory_random
+    vendor_lines = len(sample['BSIK']) + len(sample['BSAK'])
+    customer_lines = len(sample['BSID']) + len(sample['BSAD'])
+    vendor_cleared_share = len(sample['BSAK']) / vendor_lines if vendor_lines else 0.0
+    customer_cleared_share = len(sample['BSAD']) / customer_lines if customer_lines else 0.0
+    
+    rows = expected_row_counts(volumes, start_date, end_date, vendor_cleared_share, customer_cleared_share)
+    rows = {table_name: round(count) for table_name, count in rows.items()}
+    
+    bytes_per_row = {output_format: {} for output_format in PLAN_FORMATS}
+    memory_bytes = 0
+    serialize_seconds = 0.0
+    largest_table_sql_bytes = 0
+    for table_name, records in sample.items():
+        if not records:
+            continue
+        columns = table_columns(table_name)
+        started = time.perf_counter()
+        sql_bytes = len(generator.create_insert_statements(table_name, records).encode('utf-8'))
+        serialize_seconds += (time.perf_counter() - started) / len(records) * rows[table_name]
+        bytes_per_row['sql'][table_name] = sql_bytes / len(records)
+        bytes_per_row['csv'][table_name] = len(format_stream_rows(columns, records, 'csv').encode('utf-8')) / len(records)
+        bytes_per_row['ndjson'][table_name] = len(format_stream_rows(columns, records, 'ndjson').encode('utf-8')) / len(records)
+        memory_bytes += sum(record_memory_bytes(record) for record in records) / len(records) * rows[table_name]
+        largest_table_sql_bytes = max(largest_table_sql_bytes, bytes_per_row['sql'][table_name] * rows[table_name])
+    
+    output_bytes = {
+        output_format: round(sum(per_row[table_name] * rows[table_name] for table_name in per_row))
+        for output_format, per_row in bytes_per_row.items()
+    }
+    output_bytes['sql'] += sum(len(table_ddl(table_name)) for table_name in TABLE_SCHEMAS)
+    
+    # Generation time scales with each stage's driving volume; reference data
+    # (payment terms, company codes, exchange rates) only with the date window
+    generate_seconds = sum(
+        seconds * (volumes[stage] / PLAN_CALIBRATION_VOLUMES[stage] if stage in PLAN_CALIBRATION_VOLUMES else 1)
+        for stage, seconds in generator.stage_seconds.items()
+    )
+    
+    # Records and the largest table's VALUES list are alive together, plus the
+    # finished script unless the parallel writer streams segments to disk
+    peak_memory = memory_bytes + largest_table_sql_bytes
+    if artifact == 'sqlite' or SQL_WRITER_PROCESSES == 1:
+        peak_memory += output_bytes['sql']
+    peak_memory = round(peak_memory)
+    
+    warnings = []
+    available_memory = available_memory_bytes()
+    if available_memory is not None and peak_memory > available_memory:
+        warnings.append(f"Estimated peak memory {peak_memory / 1024 ** 3:.1f} GB exceeds "
+                        f"available memory {available_memory / 1024 ** 3:.1f} GB")
+    disk_bytes = output_bytes['sql'] + (output_bytes[PARTITION_FORMAT] if PARTITIONED_OUTPUT else 0)
+    free_disk = shutil.disk_usage(output_dir).free
+    if disk_bytes > free_disk:
+        warnings.append(f"Estimated output {disk_bytes / 1024 ** 3:.1f} GB exceeds "
+                        f"free disk space {free_disk / 1024 ** 3:.1f} GB in {output_dir}")
+    for table_name, field, driver, space in RANDOM_NUMBER_RANGES:
+        draws = volumes[driver]
+        collision_probability = 1 - math.exp(-draws * (draws - 1) / (2 * space))
+        if collision_probability > PLAN_COLLISION_THRESHOLD:
+            warnings.append(f"{table_name}.{field}: {draws:,} random numbers from a range of {space:,} "
+                            f"collide with probability {collision_probability:.1%}")
+    
+    return {
+        'volumes': volumes,
+        'rows': rows,
+        'total_rows': sum(rows.values()),
+        'output_bytes': output_bytes,
+        'peak_memory_bytes': peak_memory,
+        'wall_seconds': {
+            'generate': generate_seconds,
+            'serialize_sql': serialize_seconds,
+            'total': generate_seconds + serialize_seconds
+        },
+        'warnings': warnings
+    }
+
+def print_plan(plan):
+    """Print a run plan produced by plan_run"""
+    print("\nRun Plan (estimates)")
+    print("=" * 60)
+    for table_name, count in plan['rows'].items():
+        print(f"{table_name}: {count:,} rows")
+    print(f"\nTotal rows: {plan['total_rows']:,}")
+    print("\nOutput size:")
+    for output_format, size in plan['output_bytes'].items():
+        print(f"  - {output_format}: {size / 1024 ** 2:,.1f} MB")
+    print(f"\nPeak memory: {plan['peak_memory_bytes'] / 1024 ** 2:,.1f} MB")
+    print(f"Wall time: {plan['wall_seconds']['total']:,.1f} s "
+          f"(generate {plan['wall_seconds']['generate']:,.1f} s, "
+          f"SQL script {plan['wall_seconds']['serialize_sql']:,.1f} s)")
+    if plan['warnings']:
+        print("\nWarnings:")
+        for warning in plan['warnings']:
+            print(f"  - {warning}")
+
+class HyperLogLog:
+    """Mergeable distinct count sketch: 2**precision one-byte registers
+    
+    Values are hashed with BLAKE2b rather than hash(), so registers built in
+    different processes (shards) agree and can be merged.
+    """
+    
+    def __init__(self, precision=PROFILE_HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+    
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        rank = remaining_bits - (hashed & ((1 << remaining_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+    
+    def estimate(self):
+        """Estimated number of distinct values, linear counting for small sets"""
+        size = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / size) * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+    
+    def state(self):
+        return {'precision': self.precision, 'registers': base64.b64encode(self.registers).decode('ascii')}
+    
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['precision'])
+        sketch.registers = bytearray(base64.b64decode(state['registers']))
+        return sketch
+
+class QuantileSketch:
+    """Mergeable quantile sketch with relative error guarantees (DDSketch)
+    
+    Values fall into logarithmic bins, so every estimate is within
+    relative_accuracy of a true value of that rank. Each sign keeps at most
+    max_bins bins; beyond that the lowest magnitudes are collapsed, which
+    only coarsens the quantiles nearest zero.
+    """
+    
+    def __init__(self, relative_accuracy=PROFILE_QUANTILE_ACCURACY, max_bins=PROFILE_QUANTILE_MAX_BINS):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+    
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if -1e-9 < value < 1e-9:
+            self.zero += 1
+            return
+        bins = self.positive if value > 0 else self.negative
+        key = math.ceil(math.log(abs(value)) / self.log_gamma)
+        bins[key] = bins.get(key, 0) + 1
+        if len(bins) > self.max_bins:
+            self.collapse(bins)
+    
+    def collapse(self, bins):
+        keys = sorted(bins)
+        excess = len(keys) - self.max_bins
+        for key in keys[:excess]:
+            bins[keys[excess]] += bins.pop(key)
+    
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge quantile sketches of different accuracy")
+        for bins, other_bins in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_bins.items():
+                bins[key] = bins.get(key, 0) + count
+            if len(bins) > self.max_bins:
+                self.collapse(bins)
+        self.zero += other.zero
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+    
+    def bin_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+    
+    def quantile(self, q):
+        """Estimated q-quantile (0 <= q <= 1), None when empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self.bin_value(key), self.min)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self.bin_value(key), self.max)
+        return self.max
+    
+    def summary(self):
+        summary = {'count': self.count, 'min': self.min, 'max': self.max,
+                   'mean': round(self.total / self.count, 2) if self.count else None}
+        for q in PROFILE_QUANTILES:
+            value = self.quantile(q)
+            summary[f"p{round(q * 100)}"] = None if value is None else round(value, 2)
+        return summary
+    
+    def state(self):
+        return {
+            'relative_accuracy': self.relative_accuracy, 'max_bins': self.max_bins,
+            'positive': self.positive, 'negative': self.negative, 'zero': self.zero,
+            'count': self.count, 'total': self.total, 'min': self.min, 'max': self.max
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['relative_accuracy'], state['max_bins'])
+        sketch.positive = {int(key): count for key, count in state['positive'].items()}
+        sketch.negative = {int(key): count for key, count in state['negative'].items()}
+        for field in ('zero', 'count', 'total', 'min', 'max'):
+            setattr(sketch, field, state[field])
+        return sketch
+
+class DataProfile:
+    """Single-pass profile of a generated dataset built from streaming sketches
+    
+    Every row goes through add() once: HyperLogLog distinct counts for
+    PROFILE_DISTINCT_COLUMNS, quantile sketches for PROFILE_QUANTILE_COLUMNS
+    and days-to-clear (AUGDT - BLDAT of cleared vendor/customer lines), and
+    counters for PO approval status, on-time vs late vs open payments and
+    open items per company code. Memory is bounded whatever the volume, and
+    profiles of separate shards merge into the profile of their union.
+    """
+    
+    def __init__(self):
+        self.row_counts = Counter()
+        self.distinct = {name: HyperLogLog() for name in PROFILE_DISTINCT_COLUMNS}
+        self.quantiles = {name: QuantileSketch() for name in [*PROFILE_QUANTILE_COLUMNS, 'days_to_clear']}
+        self.counters = {name: Counter() for name in PROFILE_COUNTERS}
+        
+        # Per table: (sketch add function, column) pairs fed by add()
+        self.feeds = {}
+        for sketches, columns in ((self.distinct, PROFILE_DISTINCT_COLUMNS), (self.quantiles, PROFILE_QUANTILE_COLUMNS)):
+            for name, (table_name, column) in columns.items():
+                self.feeds.setdefault(table_name, []).append((sketches[name].add, column))
+    
+    def add(self, table_name, record):
+        """Feed one emitted row into the sketches"""
+        self.row_counts[table_name] += 1
+        for add, column in self.feeds.get(table_name, ()):
+            if record[column] is not None:
+                add(record[column])
+        
+        if table_name == 'EKKO':
+            self.counters['approval_status'][record['FRGZU']] += 1
+        elif table_name == 'BSEG' and record['KOART'] in PAYMENT_GRACE_DAYS:
+            payments = self.counters['vendor_payments' if record['KOART'] == 'K' else 'customer_payments']
+            if record['AUGDT'] is None:
+                payments['open'] += 1
+                self.counters['open_items_by_bukrs'][record['BUKRS']] += 1
+            else:
+                days_to_clear = (record['AUGDT'] - record['BLDAT']).days
+                self.quantiles['days_to_clear'].add(days_to_clear)
+                late = days_to_clear - record['ZBD1T'] > PAYMENT_GRACE_DAYS[record['KOART']]
+                payments['late' if late else 'on_time'] += 1
+    
+    def add_dataset(self, data):
+        for table_name, records in data.items():
+            for record in records:
+                self.add(table_name, record)
+        return self
+    
+    def merge(self, other):
+        """Fold the profile of another shard into this one"""
+        self.row_counts.update(other.row_counts)
+        for name, sketch in self.distinct.items():
+            sketch.merge(other.distinct[name])
+        for name, sketch in self.quantiles.items():
+            sketch.merge(other.quantiles[name])
+        for name, counter in self.counters.items():
+            counter.update(other.counters[name])
+        return self
     
-    # Save to file
-    with open('sap_dummy_data.sql', 'w', encoding='utf-8') as f:
-        f.write(sql_script)
+    def summary(self):
+        return {
+            'row_counts': {table_name: self.row_counts[table_name] for table_name in TABLE_SCHEMAS},
+            'distinct': {name: sketch.estimate() for name, sketch in self.distinct.items()},
+            'quantiles': {name: sketch.summary() for name, sketch in self.quantiles.items()},
+            'counters': {name: dict(sorted(counter.items())) for name, counter in self.counters.items()}
+        }
+    
+    def state(self):
+        return {
+            'row_counts': dict(self.row_counts),
+            'distinct': {name: sketch.state() for name, sketch in self.distinct.items()},
+            'quantiles': {name: sketch.state() for name, sketch in self.quantiles.items()},
+            'counters': {name: dict(counter) for name, counter in self.counters.items()}
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        profile = cls()
+        profile.row_counts = Counter(state['row_counts'])
+        profile.distinct = {name: HyperLogLog.from_state(sketch) for name, sketch in state['distinct'].items()}
+        profile.quantiles = {name: QuantileSketch.from_state(sketch) for name, sketch in state['quantiles'].items()}
+        profile.counters = {name: Counter(counter) for name, counter in state['counters'].items()}
+        return profile
     
-    print(f"SQL script generated successfully: sap_dummy_data.sql")
+    def to_html(self):
+        """Render the summary as a standalone HTML page"""
+        summary = self.summary()
+        
+        def cell(value):
+            if value is None:
+                return ''
+            return escape(f"{value:,}" if isinstance(value, (int, float)) else str(value))
+        
+        def table(title, headers, rows):
+            head = ''.join(f"<th>{cell(header)}</th>" for header in headers)
+            body = ''.join('<tr>' + ''.join(f"<td>{cell(value)}</td>" for value in row) + '</tr>' for row in rows)
+            return f"<h2>{escape(title)}</h2>\n<table><tr>{head}</tr>{body}</table>\n"
+        
+        quantile_fields = ['count', 'min', *(f"p{round(q * 100)}" for q in PROFILE_QUANTILES), 'max', 'mean']
+        sections = [
+            table('Rows', ['Table', 'Rows'], summary['row_counts'].items()),
+            table('Distinct values (HyperLogLog)', ['Key', 'Estimate'], summary['distinct'].items()),
+            table('Distributions', ['Measure', *quantile_fields],
+                  [[name, *(values[field] for field in quantile_fields)] for name, values in summary['quantiles'].items()])
+        ]
+        for name, counter in summary['counters'].items():
+            sections.append(table(PROFILE_COUNTERS[name], ['Value', 'Count'], counter.items()))
+        return (
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>SAP Dummy Data Profile</title>\n"
+            "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}</style></head>\n"
+            "<body><h1>SAP Dummy Data Profile</h1>\n" + ''.join(sections) + "</body></html>\n"
+        )
     
-    # Print summary statistics
-    print("\nData Generation Summary:")
+    def write(self, base_path):
+        """Write <base_path>.json (summary and mergeable state) and <base_path>.html"""
+        with open(base_path + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'profile': self.summary(), 'state': self.state()}, f, indent=2)
+        with open(base_path + '.html', 'w', encoding='utf-8') as f:
+            f.write(self.to_html())
+        return base_path + '.json', base_path + '.html'
+
+def load_profile(path):
+    """Read the mergeable state of a profile JSON written by DataProfile.write"""
+    with open(path, encoding='utf-8') as f:
+        return DataProfile.from_state(json.load(f)['state'])
+
+def print_profile(summary):
+    """Print a DataProfile summary"""
+    print("\nData Profile:")
     print("=" * 60)
-    for table_name, records in data.items():
-        print(f"{table_name}: {len(records):,} records")
+    for table_name, count in summary['row_counts'].items():
+        print(f"{table_name}: {count:,} records")
+    print(f"\nTotal records generated: {sum(summary['row_counts'].values()):,}")
+    print("\nDistinct values (estimated):")
+    for name, estimate in summary['distinct'].items():
+        print(f"  - {name}: {estimate:,}")
+    print("\nDistributions (p50 / p90 / p99):")
+    for name, values in summary['quantiles'].items():
+        if values['count']:
+            print(f"  - {name}: " + ' / '.join(f"{values[f'p{round(q * 100)}']:,.2f}" for q in PROFILE_QUANTILES))
+    for name, counter in summary['counters'].items():
+        if counter:
+            print(f"\n{PROFILE_COUNTERS[name]}:")
+            print('  ' + ', '.join(f"{key}: {count:,}" for key, count in counter.items()))
+
+
+def open_event_sink(target):
+    """Open a text sink for events: tcp://host:port or a file path"""
+    if target.startswith('tcp://'):
+        host, _, port = target[len('tcp://'):].rpartition(':')
+        connection = socket.create_connection((host or '127.0.0.1', int(port)))
+        return connection.makefile('w', encoding='utf-8', newline='\n')
+    return open(target, 'w', encoding='utf-8')
+
+def replay_events(events, target, rate=EVENT_RATE):
+    """Write events as NDJSON to target, paced at rate events per second
+    
+    With rate None events are written as fast as the sink accepts them.
+    Pacing is scheduled against a monotonic clock from the first event, so
+    slow writes are caught up rather than accumulating drift.
+    """
+    sink = open_event_sink(target)
+    count = 0
+    started = time.monotonic()
+    try:
+        for event in events:
+            if rate:
+                delay = started + count / rate - time.monotonic()
+                if delay > 0:
+                    sink.flush()
+                    time.sleep(delay)
+            sink.write(json.dumps(event, default=json_default, ensure_ascii=False) + '\n')
+            count += 1
+    finally:
+        sink.close()
+    return count
+
+
+class SAPDataService:
+    """Local asyncio HTTP service streaming generated tables
+    
+    GET /tables lists the available tables. GET /tables/<TABLE> streams one
+    table with chunked transfer encoding, taking the query parameters
+    format (ndjson, csv or copy), scale (multiplier on TABLE_VOLUMES),
+    seed, start and end (YYYY-MM-DD) and skew (a SKEW_PROFILES name). Every chunk waits for the socket
+    buffer to drain, so each client is served at the rate it consumes.
+    With a seed, sample (a fraction) or shard (K/N) serves just that slice,
+    generated counter-based in O(slice) instead of generating everything.
+    
+    Datasets are generated in a worker thread, one at a time because the
+    generators share the module-level random and Faker state: requests for
+    different parameters queue behind each other. Concurrent requests with
+    the same parameters share the generation in flight, unseeded ones
+    included, and seeded datasets are kept in a small LRU for repeated
+    clients. Invalid parameters, including volumes that leave no approved
+    PO to invoice, get a 400; any other generation failure a 500.
+    """
+    
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT, chunk_rows=SERVICE_CHUNK_ROWS,
+                 cache_size=SERVICE_DATASET_CACHE_SIZE):
+        self.host = host
+        self.port = port
+        self.chunk_rows = chunk_rows
+        self.cache_size = cache_size
+        self.datasets = OrderedDict()
+        self.pending = {}
+        self.generation_lock = threading.Lock()
     
-    print(f"\nTotal records generated: {sum(len(records) for records in data.values()):,}")
+    def generate(self, seed, volumes, start_date, end_date, skew_profile, sample=None, shard=None):
+        with self.generation_lock:
+            generator = SAPDataGenerator(seed=seed, volumes=volumes, start_date=start_date, end_date=end_date,
+                                         skew_profile=skew_profile)
+            if sample is not None or shard is not None:
+                return generator.generate_rows(**row_selection(seed, volumes, sample, shard))
+            return generator.generate_all_data()
+    
+    async def get_dataset(self, seed, scale, start_date, end_date, skew_profile, sample=None, shard=None):
+        """Return the dataset for the given parameters, generating it if needed"""
+        volumes = {name: max(1, round(count * scale)) for name, count in TABLE_VOLUMES.items()}
+        key = (seed, scale, start_date, end_date, skew_profile, sample, shard)
+        if seed is not None and key in self.datasets:
+            self.datasets.move_to_end(key)
+            return self.datasets[key]
+        
+        # Share a generation already in flight for the same parameters; an
+        # unseeded one is as random for every client waiting on it
+        if key in self.pending:
+            return await self.pending[key]
+        
+        future = asyncio.get_running_loop().run_in_executor(
+            None, self.generate, seed, volumes, start_date, end_date, skew_profile, sample, shard
+        )
+        self.pending[key] = future
+        try:
+            data = await future
+        finally:
+            del self.pending[key]
+        if seed is None:
+            return data
+        
+        self.datasets[key] = data
+        while len(self.datasets) > self.cache_size:
+            self.datasets.popitem(last=False)
+        return data
+    
+    async def send_response(self, writer, status, content_type, body):
+        payload = body.encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode('ascii') + payload
+        )
+        await writer.drain()
+    
+    async def send_error(self, writer, status, message):
+        await self.send_response(writer, status, 'application/json', json.dumps({'error': message}) + '\n')
+    
+    async def stream_table(self, writer, table_name, records, output_format):
+        """Stream records in chunks of chunk_rows, draining after each chunk"""
+        columns = table_columns(table_name)
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: {STREAM_FORMATS[output_format]}\r\n"
+            f"Transfer-Encoding: chunked\r\nX-Row-Count: {len(records)}\r\n"
+            f"Connection: close\r\n\r\n".encode('ascii')
+        )
+        
+        for start in range(0, max(len(records), 1), self.chunk_rows):
+            chunk = format_stream_rows(
+                columns, records[start:start + self.chunk_rows], output_format, include_header=start == 0
+            ).encode('utf-8')
+            if chunk:
+                writer.write(f"{len(chunk):x}\r\n".encode('ascii') + chunk + b"\r\n")
+                await writer.drain()
+        
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+    
+    async def handle(self, reader, writer):
+        """Serve a single GET request per connection"""
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            
+            if len(request_line) < 2 or request_line[0] != 'GET':
+                await self.send_error(writer, '405 Method Not Allowed', 'Only GET is supported')
+                return
+            
+            url = urlsplit(request_line[1])
+            path = url.path.rstrip('/').split('/')
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            
+            if path in ([''], ['', 'tables']):
+                await self.send_response(writer, '200 OK', 'application/json', json.dumps({
+                    'tables': list(TABLE_SCHEMAS),
+                    'formats': list(STREAM_FORMATS)
+                }) + '\n')
+                return
+            
+            if len(path) != 3 or path[1] != 'tables' or path[2].upper() not in TABLE_SCHEMAS:
+                await self.send_error(writer, '404 Not Found', f"Unknown path: {url.path}")
+                return
+            table_name = path[2].upper()
+            
+            try:
+                output_format = params.get('format', 'ndjson')
+                if output_format not in STREAM_FORMATS:
+                    raise ValueError(f"Unknown format: {output_format}")
+                seed = int(params['seed']) if 'seed' in params else None
+                scale = float(params.get('scale', 1.0))
+                if not math.isfinite(scale) or scale <= 0:
+                    raise ValueError("scale must be a positive finite number")
+                start_date = date.fromisoformat(params['start']) if 'start' in params else START_DATE
+                end_date = date.fromisoformat(params['end']) if 'end' in params else END_DATE
+                if start_date > end_date:
+                    raise ValueError("start must not be after end")
+                skew_profile = params.get('skew', SKEW_PROFILE)
+                if skew_profile not in SKEW_PROFILES:
+                    raise ValueError(f"Unknown skew profile: {skew_profile}")
+                sample = float(params['sample']) if 'sample' in params else None
+                shard = parse_shard(params['shard']) if 'shard' in params else None
+                if (sample is not None or shard is not None) and seed is None:
+                    raise ValueError("sample and shard require a seed")
+                if sample is not None and shard is not None:
+                    raise ValueError("sample and shard are mutually exclusive")
+                if sample is not None and not 0 < sample <= 1:
+                    raise ValueError("sample must be a fraction in (0, 1]")
+            except ValueError as error:
+                await self.send_error(writer, '400 Bad Request', str(error))
+                return
+            
+            try:
+                data = await self.get_dataset(seed, scale, start_date, end_date, skew_profile, sample, shard)
+            except ValueError as error:
+                await self.send_error(writer, '400 Bad Request', str(error))
+                return
+            except Exception as error:
+                print(f"Generation failed: {error!r}", file=sys.stderr)
+                await self.send_error(writer, '500 Internal Server Error', f"Generation failed: {error}")
+                return
+            await self.stream_table(writer, table_name, data[table_name], output_format)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # Client went away mid-stream
+            pass
+        finally:
+            writer.close()
+    
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f"Streaming SAP data on http://{self.host}:{self.port}/tables")
+        async with server:
+            await server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate realistic SAP P2P and O2C dummy data")
+    parser.add_argument('--skew', choices=list(SKEW_PROFILES), default=SKEW_PROFILE,
+                        help="key skew profile (Zipf partners, period-end peaks, company code concentration)")
+    parser.add_argument('--plan', action='store_true',
+                        help="estimate rows, output size, memory and wall time without generating")
+    parser.add_argument('--serve', action='store_true',
+                        help="run the local HTTP service streaming tables instead of writing files")
+    parser.add_argument('--host', default=SERVICE_HOST, help="service bind address")
+    parser.add_argument('--port', type=int, default=SERVICE_PORT, help="service port")
+    parser.add_argument('--events', metavar='TARGET',
+                        help="replay a time-ordered business event stream to a file or tcp://host:port")
+    parser.add_argument('--events-rate', type=float, default=EVENT_RATE,
+                        help="events per second (default: as fast as possible)")
+    parser.add_argument('--merge-profiles', nargs='+', metavar='PROFILE',
+                        help="merge .profile.json files of separate shards into sap_dummy_data.profile.json/.html")
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED,
+                        help="random seed (default: RANDOM_SEED)")
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument('--sample', type=float, metavar='FRACTION',
+                           help="generate a referentially closed sample of every table (counter-based, needs --seed)")
+    selection.add_argument('--shard', type=parse_shard, metavar='K/N',
+                           help="generate shard K (from 0) of N disjoint row ranges (counter-based, needs --seed)")
+    args = parser.parse_args(argv)
+    if (args.sample is not None or args.shard is not None) and args.seed is None:
+        parser.error("--sample and --shard require --seed (or RANDOM_SEED)")
+    if args.sample is not None and not 0 < args.sample <= 1:
+        parser.error("--sample must be a fraction in (0, 1]")
+    return args
+
+def main(argv=None):
+    """Main function to generate SAP data and create SQL script
+    
+    Returns (data, sql_script); on a cache hit both are restored from the cache.
+    """
+    args = parse_args(argv)
+    
+    if args.plan:
+        print("Calibrating run plan...")
+        print_plan(plan_run(skew_profile=args.skew))
+        return None, None
+    
+    if args.serve:
+        try:
+            asyncio.run(SAPDataService(args.host, args.port).serve_forever())
+        except KeyboardInterrupt:
+            print("\nService stopped")
+        return None, None
+    
+    if args.merge_profiles:
+        profile = DataProfile()
+        for path in args.merge_profiles:
+            profile.merge(load_profile(path))
+        json_path, html_path = profile.write('sap_dummy_data.profile')
+        print_profile(profile.summary())
+        print(f"\nMerged profile written: {json_path}, {html_path}")
+        return None, None
+    
+    if args.events:
+        generator = SAPDataGenerator(seed=args.seed, skew_profile=args.skew)
+        data = generator.generate_all_data()
+        print(f"Replaying business events to {args.events}...")
+        count = replay_events(generator.generate_event_stream(data), args.events, args.events_rate)
+        print(f"Events written: {count:,}")
+        return data, None
+    
+    print("Starting SAP data generation...")
+    
+    # Samples and shards are written next to the full run, with their own
+    # script and partition directory each
+    variant = ''
+    if args.sample is not None:
+        variant = f".sample-{args.sample:g}"
+    if args.shard is not None:
+        variant = f".{args.shard[0]}-of-{args.shard[1]}"
+    output_path = f"sap_dummy_data{variant}.sql"
+    partition_dir = f"{PARTITION_OUTPUT_DIR}{variant}"
+    
+    # The records are cached too, so a hit returns them and feeds partitioned output
+    counter_based = args.sample is not None or args.shard is not None
+    cache = DatasetCache() if USE_CACHE and args.seed is not None and not counter_based else None
+    profile = DataProfile()
+    data, row_counts = generate_dataset(output_path, seed=args.seed, cache=cache, skew_profile=args.skew,
+                                        sample=args.sample, shard=args.shard, data_profile=profile,
+                                        load_records=True)
+    
+    print(f"SQL script written: {output_path}")
+    
+    if PARTITIONED_OUTPUT:
+        print(f"Writing partitioned {PARTITION_FORMAT} output...")
+        manifest = SAPDataGenerator().write_partitioned_output(data, partition_dir)
+        partition_count = sum(len(entries) for entries in manifest['tables'].values())
+        print(f"Partitioned output written: {partition_dir}/ ({partition_count:,} partitions)")
+    
+    # Print the data profile (row counts only for cache entries written without one)
+    if profile.row_counts:
+        print_profile(profile.summary())
+        if PROFILE_OUTPUT:
+            json_path, html_path = profile.write(os.path.splitext(output_path)[0] + '.profile')
+            print(f"\nProfile written: {json_path}, {html_path}")
+    else:
+        print("\nData Generation Summary:")
+        print("=" * 60)
+        for table_name, count in row_counts.items():
+            print(f"{table_name}: {count:,} records")
+        print(f"\nTotal records generated: {sum(row_counts.values()):,}")
     
     # Print data range and analysis recommendations
     print(f"\nData Range: {START_DATE} to {END_DATE}")
@@ -946,19 +3345,22 @@ def main():
     print("\nRecommended PowerBI Filters:")
     print(f"  - Transaction Analysis: {ANALYSIS_FOCUS_YEAR}-01-01 to {ANALYSIS_FOCUS_YEAR}-12-31")
     print(f"  - Payment Analysis: {ANALYSIS_FOCUS_YEAR}-01-01 to {END_DATE}")
-    print(f"  - Outstanding Items: Filter AUGDT IS NULL for unpaid items")
-    
-    # Print payment terms summary
-    print(f"\nPayment Terms Generated:")
-    for term, days in PAYMENT_TERMS_DAYS.items():
-        print(f"  {term}: {days} days")
+    print(f"  - Outstanding Items: Use BSIK/BSID (or filter BSEG on AUGDT IS NULL) for unpaid items")
     
     print(f"\nRealistic Business Scenarios:")
     print(f"  - Late 2024 transactions may have payments extending into 2025")
     print(f"  - NULL payment dates represent realistic unpaid/overdue items")
     print(f"  - Payment terms up to 120 days simulate enterprise scenarios")
     
+    with open(output_path, encoding='utf-8') as f:
+        sql_script = f.read()
+    
     return data, sql_script
 
 if __name__ == "__main__":
+    # Pin the hash seed (see python_hash_seed) so seeded runs are reproducible
+    # and cacheable, restarting the interpreter once if it is not set
+    if python_hash_seed() is None:
+        os.environ['PYTHONHASHSEED'] = '0'
+        os.execv(sys.executable, [sys.executable] + sys.argv)
     data, sql_script = main()
\ No newline at end of file
@@ -0,0 +1,32 @@
+import random
+
+import sap_data_generator as sdg
+
+
+def test_counter_row_streams_differ():
+    generator = sdg.SAPDataGenerator(seed=42)
+    generator.seed_row('customers', 7)
+    assert [random.random() for _ in range(4)] != [generator.row_random.random() for _ in range(4)]
+
+
+def test_counter_region_independent_of_name_format():
+    # Region comes from random, NAME1 from Faker; the share of multi-name
+    # companies ("A-B", "A, B and C") must not depend on the region
+    count = 4000
+    generator = sdg.SAPDataGenerator(seed=42, volumes={'customers': count})
+    customers = generator.generate_rows({'customers': range(count)})['KNA1']
+    region_of = {country: region for region, countries in sdg.REGIONS.items() for country in countries}
+    
+    table = {region: [0, 0] for region in sdg.REGIONS}
+    for customer in customers:
+        multi_name = '-' in customer['NAME1'] or ' and ' in customer['NAME1']
+        table[region_of[customer['LAND1']]][multi_name] += 1
+    
+    # Chi-square test of independence, 4 degrees of freedom, p = 0.001
+    share = sum(counts[1] for counts in table.values()) / count
+    chi_square = 0.0
+    for counts in table.values():
+        total = sum(counts)
+        for observed, expected in zip(counts, (total * (1 - share), total * share)):
+            chi_square += (observed - expected) ** 2 / expected
+    assert chi_square < 18.47, table